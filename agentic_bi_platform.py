@@ -278,6 +278,10 @@ def analyze_data_health(conn, schema):
     health_report = {}
     
     for table_name, table_info in schema.items():
+        # Skip cached metadata entries like '_index'; not tables
+        if table_name.startswith('_'):
+            continue
+
         table_health = {
             'row_count': table_info['row_count'],
             'column_count': len(table_info['columns']),
@@ -346,6 +350,9 @@ def generate_insight(conn, query, schema):
         
         # Convert each table in our schema to agent's expected format
         for table_name, table_info in schema.items():
+            if table_name.startswith('_'):
+                continue
+
             table_data = {
                 'name': table_name,
                 'columns': []
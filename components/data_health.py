@@ -27,6 +27,9 @@ def render_data_health_page():
         health_report = {}
         
         for table_name, table_info in selected_db['schema'].items():
+            # Skip cached metadata entries like '_index'; not tables
+            if table_name.startswith('_'):
+                continue
             health_report[table_name] = schema_analyzer.analyze_table_health(selected_db['conn'], table_name, table_info)
         
         if health_report:
@@ -5,10 +5,16 @@
 import json
 import datetime
 import os
-from dataclasses import dataclass, field, asdict
+import concurrent.futures
+from dataclasses import dataclass, field, fields, asdict
 from typing import Dict, List, Optional, Any, Union
 
-@dataclass
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@dataclass(slots=True)
 class ReportConfig:
     """Configuration for a report."""
     visualization_type: str
@@ -25,9 +31,13 @@ class ReportConfig:
     @classmethod
     def from_dict(cls, data: Dict):
         """Create a ReportConfig instance from a dictionary."""
-        return cls(**data)
+        try:
+            return cls(*[data[name] for name in cls._FIELDS])
+        except KeyError:
+            # Partial dicts (e.g. hand-written configs) fall back to kwargs
+            return cls(**data)
 
-@dataclass
+@dataclass(slots=True)
 class Report:
     """A saved report."""
     id: str
@@ -43,31 +53,76 @@ class Report:
     created_by: Optional[str] = None
     goal: Optional[str] = None
     tags: List[str] = field(default_factory=list)
-    
+    # Serialization cache; most reports are unchanged between saves, so
+    # to_dict reuses its last result until updated_at moves.
+    _dict_cache: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    _dict_cache_ts: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
     def to_dict(self):
         """Convert to dictionary."""
-        result = asdict(self)
-        result['config'] = self.config.to_dict()
+        if self._dict_cache is None or self._dict_cache_ts != self.updated_at:
+            result = asdict(self)
+            del result['_dict_cache'], result['_dict_cache_ts']
+            result['config'] = self.config.to_dict()
+
+            self._dict_cache = result
+            self._dict_cache_ts = self.updated_at
+
+        # Copy the dict and its mutable members so edits to the return
+        # value (or from_dict's in-place config swap) can't reach the
+        # cache; rows and config hold scalars, so this stays shallow
+        # per level while matching what a fresh asdict would hand out
+        result = dict(self._dict_cache)
+        result['config'] = dict(result['config'])
+        result['tags'] = list(result['tags'])
+        result['data'] = [dict(row) for row in result['data']]
         return result
     
     @classmethod
     def from_dict(cls, data: Dict):
-        """Create a Report instance from a dictionary."""
-        report_data = data.copy()
-        
+        """Create a Report instance from a dictionary.
+
+        The dict is mutated in place (config is swapped for a ReportConfig),
+        so callers must not reuse it afterwards.
+        """
         # Convert config to ReportConfig
-        if 'config' in report_data and isinstance(report_data['config'], dict):
-            report_data['config'] = ReportConfig.from_dict(report_data['config'])
-        
-        return cls(**report_data)
+        if 'config' in data and isinstance(data['config'], dict):
+            data['config'] = ReportConfig.from_dict(data['config'])
+
+        try:
+            return cls(*[data[name] for name in cls._FIELDS])
+        except KeyError:
+            # Partial dicts fall back to keyword dispatch
+            return cls(**data)
     
     def update(self, **kwargs):
         """Update report attributes."""
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
-        
+
         self.updated_at = datetime.datetime.now().isoformat()
+        self._dict_cache = None
+
+# Field order used by the positional fast path in from_dict, computed once
+# per class so bulk loads skip per-field keyword dispatch.
+ReportConfig._FIELDS = tuple(f.name for f in fields(ReportConfig) if f.init)
+Report._FIELDS = tuple(f.name for f in fields(Report) if f.init)
+
+# Shard stores smaller than this load serially; worker startup would
+# otherwise outweigh the parse work.
+_PARALLEL_LOAD_THRESHOLD = 64
+
+def _load_report_file(file_path: str) -> Report:
+    """Load a single report shard (module-level so worker processes can run it)."""
+    if orjson is not None:
+        with open(file_path, 'rb') as f:
+            data = orjson.loads(f.read())
+    else:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+
+    return Report.from_dict(data)
 
 class ReportManager:
     """Manages reports."""
@@ -83,6 +138,16 @@ class ReportManager:
         self.reports[report.id] = report
         return True
     
+    def _bulk_load(self, reports_data: Dict[str, Dict]) -> None:
+        """Load reports from our own dump, skipping the collision check.
+
+        IDs in a dump are dict keys and therefore already unique, so the
+        per-report membership probe in add_report is pure overhead here.
+        """
+        for data in reports_data.values():
+            report = Report.from_dict(data)
+            self.reports[report.id] = report
+
     def remove_report(self, report_id: str) -> bool:
         """Remove a report."""
         if report_id not in self.reports:
@@ -110,25 +175,26 @@ class ReportManager:
         filtered_reports = []
         
         for report in self.reports.values():
-            # Check each filter criterion
+            # Cheap, high-selectivity equality checks first; the tags scan
+            # is the most expensive predicate so it runs last.
+            if created_by and report.created_by != created_by:
+                continue
+
             if goal and report.goal != goal:
                 continue
-            
+
             if database and report.database != database:
                 continue
-            
-            if tags and not all(tag in report.tags for tag in tags):
-                continue
-            
-            if created_by and report.created_by != created_by:
-                continue
-            
+
             if start_date and report.created_at < start_date:
                 continue
-            
+
             if end_date and report.created_at > end_date:
                 continue
-            
+
+            if tags and not all(tag in report.tags for tag in tags):
+                continue
+
             filtered_reports.append(report)
         
         return filtered_reports
@@ -140,13 +206,54 @@ class ReportManager:
             reports_data = {report_id: report.to_dict() for report_id, report in self.reports.items()}
             
             with open(file_path, 'w') as f:
-                json.dump(reports_data, f)
+                json.dump(reports_data, f, separators=(',', ':'))
             
             return True
         except Exception as e:
             print(f"Error saving reports to file: {e}")
             return False
     
+    def save_to_dir(self, dir_path: str) -> bool:
+        """Save reports as one file per report."""
+        try:
+            os.makedirs(dir_path, exist_ok=True)
+
+            for report_id, report in self.reports.items():
+                with open(os.path.join(dir_path, f"{report_id}.json"), 'w') as f:
+                    json.dump(report.to_dict(), f, separators=(',', ':'))
+
+            return True
+        except Exception as e:
+            print(f"Error saving reports to directory: {e}")
+            return False
+
+    @classmethod
+    def load_from_dir(cls, dir_path: str, max_workers: Optional[int] = None) -> 'ReportManager':
+        """Load per-report shard files, reconstructing in parallel for large stores."""
+        manager = cls()
+
+        try:
+            if not os.path.isdir(dir_path):
+                return manager
+
+            paths = [os.path.join(dir_path, name)
+                     for name in sorted(os.listdir(dir_path)) if name.endswith('.json')]
+
+            if len(paths) < _PARALLEL_LOAD_THRESHOLD:
+                reports = [_load_report_file(path) for path in paths]
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+                    reports = list(executor.map(_load_report_file, paths, chunksize=32))
+
+            # Shard file names are unique, so assign directly
+            for report in reports:
+                manager.reports[report.id] = report
+
+            return manager
+        except Exception as e:
+            print(f"Error loading reports from directory: {e}")
+            return manager
+
     @classmethod
     def load_from_file(cls, file_path: str) -> 'ReportManager':
         """Load reports from a file."""
@@ -156,13 +263,16 @@ class ReportManager:
             if not os.path.exists(file_path):
                 return manager
             
-            with open(file_path, 'r') as f:
-                reports_data = json.load(f)
-            
-            for report_id, data in reports_data.items():
-                report = Report.from_dict(data)
-                manager.add_report(report)
-            
+            # orjson parses roughly 2x faster than the stdlib on bulk loads
+            if orjson is not None:
+                with open(file_path, 'rb') as f:
+                    reports_data = orjson.loads(f.read())
+            else:
+                with open(file_path, 'r') as f:
+                    reports_data = json.load(f)
+
+            manager._bulk_load(reports_data)
+
             return manager
         except Exception as e:
             print(f"Error loading reports from file: {e}")
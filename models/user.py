@@ -3,9 +3,9 @@ import json
 import datetime
 import os
 from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """User information."""
     id: str
@@ -31,6 +31,7 @@ class UserManager:
     
     def __init__(self):
         self.users: Dict[str, User] = {}
+        self._dirty: Set[str] = set()
     
     def add_user(self, user: User) -> bool:
         """Add a new user."""
@@ -69,8 +70,52 @@ class UserManager:
             return False
         
         self.users[user_id].last_login = datetime.datetime.now().isoformat()
+        self._dirty.add(user_id)
         return True
-    
+
+    def flush(self, dir_path: str) -> bool:
+        """Write only users changed since the last flush to per-user files.
+
+        Avoids reserializing the entire user map on login-heavy workloads;
+        call rebuild_index periodically to consolidate into the main file.
+        """
+        try:
+            os.makedirs(dir_path, exist_ok=True)
+
+            for user_id in self._dirty:
+                user = self.users.get(user_id)
+                if user is None:
+                    continue
+
+                with open(os.path.join(dir_path, f"{user_id}.json"), 'w') as f:
+                    json.dump(user.to_dict(), f, separators=(',', ':'))
+
+            self._dirty.clear()
+            return True
+        except Exception as e:
+            print(f"Error flushing users: {e}")
+            return False
+
+    def rebuild_index(self, dir_path: str, file_path: str) -> bool:
+        """Consolidate per-user files into the main file and remove them."""
+        try:
+            if os.path.isdir(dir_path):
+                for name in os.listdir(dir_path):
+                    if not name.endswith('.json'):
+                        continue
+
+                    sidecar_path = os.path.join(dir_path, name)
+                    with open(sidecar_path, 'r') as f:
+                        user = User.from_dict(json.load(f))
+
+                    self.users[user.id] = user
+                    os.remove(sidecar_path)
+
+            return self.save_to_file(file_path)
+        except Exception as e:
+            print(f"Error rebuilding user index: {e}")
+            return False
+
     def save_to_file(self, file_path: str) -> bool:
         """Save users to a file."""
         try:
@@ -78,7 +123,7 @@ class UserManager:
             users_data = {user_id: user.to_dict() for user_id, user in self.users.items()}
             
             with open(file_path, 'w') as f:
-                json.dump(users_data, f)
+                json.dump(users_data, f, separators=(',', ':'))
             
             return True
         except Exception as e:
@@ -14,22 +14,52 @@ import numpy as np
 import os
 import re
 import json
+import queue
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 
+# Reader connections kept per database so concurrent callers (Streamlit
+# sessions, background insight generation) don't serialize on one conn
+POOL_SIZE = 4
+
 class DatabaseManager:
     """Manages database connections and operations."""
-    
+
     def __init__(self):
         self.connections = {}
-    
-    def connect_sqlite(self, db_path, db_name=None):
+
+    @staticmethod
+    def _open_connection(db_path):
+        """Open a tuned SQLite connection usable from any thread."""
+        # A larger statement cache lets repeated metadata/health queries
+        # reuse compiled bytecode instead of re-running sqlite3_prepare
+        conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+
+        # Rows come back as sqlite3.Row (C-level mapping) so callers get
+        # name-based access without building a dict per row in Python
+        conn.row_factory = sqlite3.Row
+
+        # Read-mostly tuning: WAL allows concurrent readers, NORMAL
+        # sync drops per-statement fsyncs, and a bigger in-memory page
+        # cache keeps the catalog warm during schema extraction
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA cache_size=-64000;")
+
+        return conn
+
+    def connect_sqlite(self, db_path, db_name=None, exact_counts=False):
         """
         Connect to a SQLite database.
-        
+
         Args:
             db_path (str): Path to the SQLite database file
             db_name (str, optional): Name to identify this connection. Defaults to filename.
-            
+            exact_counts (bool): Walk each table for exact row counts instead
+                of using cheap estimates. Defaults to False.
+
         Returns:
             dict: Connection info including connection object, or None if failed
         """
@@ -37,19 +67,32 @@ class DatabaseManager:
             return None
         
         try:
-            conn = sqlite3.connect(db_path)
-            
+            conn = self._open_connection(db_path)
+
             # Use filename as db_name if not provided
             if db_name is None:
                 db_name = os.path.basename(db_path).split('.')[0]
-                
+
+            # Reuse the cached schema when nothing changed since last time
+            schema = self._load_schema_cache(conn, db_path, exact_counts)
+            if schema is None:
+                schema = self.extract_schema(conn, exact_counts=exact_counts)
+                self._save_schema_cache(conn, db_path, schema, exact_counts)
+
+            # Pool of extra reader connections for concurrent callers;
+            # 'conn' stays as the dedicated primary for legacy access
+            pool = queue.Queue(maxsize=POOL_SIZE)
+            for _ in range(POOL_SIZE):
+                pool.put(self._open_connection(db_path))
+
             # Store connection info
             connection_info = {
                 'name': db_name,
                 'type': 'sqlite',
                 'path': db_path,
                 'conn': conn,
-                'schema': self.extract_schema(conn)
+                'pool': pool,
+                'schema': schema
             }
             
             self.connections[db_name] = connection_info
@@ -59,72 +102,224 @@ class DatabaseManager:
             print(f"Error connecting to SQLite database: {e}")
             return None
     
-    def extract_schema(self, conn):
+    @staticmethod
+    def _schema_cache_path(db_path):
+        """Path of the on-disk schema cache for a database file."""
+        return f"{db_path}.schema.json"
+
+    def _load_schema_cache(self, conn, db_path, exact_counts=False):
+        """
+        Load a previously extracted schema from disk.
+
+        The cache is keyed by PRAGMA schema_version (changes on any DDL)
+        plus the database file's mtime (catches row-count changes), so a
+        warm start skips all the metadata SQL. It also records how the
+        row counts were computed, so a caller asking for exact_counts
+        never gets back cached estimates (or vice versa).
+
+        Returns:
+            dict: Cached schema, or None if missing or stale
+        """
+        cache_path = self._schema_cache_path(db_path)
+
+        try:
+            if not os.path.exists(cache_path):
+                return None
+
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+
+            schema_version = conn.execute("PRAGMA schema_version;").fetchone()[0]
+
+            if (cached.get('schema_version') == schema_version and
+                    cached.get('mtime') == os.path.getmtime(db_path) and
+                    cached.get('exact_counts', False) == exact_counts):
+                return cached.get('schema')
+
+            return None
+        except Exception as e:
+            print(f"Error reading schema cache: {e}")
+            return None
+
+    def _save_schema_cache(self, conn, db_path, schema, exact_counts=False):
+        """Atomically write the schema cache next to the database file."""
+        cache_path = self._schema_cache_path(db_path)
+
+        try:
+            schema_version = conn.execute("PRAGMA schema_version;").fetchone()[0]
+
+            cached = {
+                'schema_version': schema_version,
+                'mtime': os.path.getmtime(db_path),
+                'exact_counts': exact_counts,
+                'schema': schema
+            }
+
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(cached, f, separators=(',', ':'))
+
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"Error writing schema cache: {e}")
+
+    def extract_schema(self, conn, exact_counts=False):
         """
         Extract database schema information.
-        
+
         Args:
             conn: Database connection object
-            
+            exact_counts (bool): Use SELECT COUNT(*) per table instead of
+                O(1) estimates from sqlite_stat1 / MAX(_ROWID_). COUNT(*)
+                walks the whole B-tree, so exact counts are opt-in.
+
         Returns:
             dict: Schema information
         """
         schema = {}
-        
+
         try:
             cursor = conn.cursor()
-            
-            # Get list of tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-            
-            for table in tables:
-                table_name = table[0]
-                
-                # Get column information
-                cursor.execute(f"PRAGMA table_info({table_name});")
-                columns = cursor.fetchall()
-                
-                column_info = []
-                for col in columns:
-                    column_info.append({
-                        'name': col[1],
-                        'type': col[2],
-                        'notnull': col[3] == 1,
-                        'default': col[4],
-                        'pk': col[5] == 1
-                    })
-                
-                # Get row count
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
-                row_count = cursor.fetchone()[0]
-                
-                # Get sample data (first 5 rows)
-                cursor.execute(f"SELECT * FROM {table_name} LIMIT 5;")
+
+            # One transaction for all the metadata reads so they share a
+            # consistent snapshot and page-cache warmup
+            cursor.execute("BEGIN")
+
+            # Get every table's columns in one query via the
+            # pragma_table_info table-valued function instead of issuing
+            # a PRAGMA per table
+            cursor.execute("""
+                SELECT m.name, ti.name, ti.type, ti."notnull", ti.dflt_value, ti.pk
+                FROM sqlite_master m
+                JOIN pragma_table_info(m.name) ti
+                WHERE m.type = 'table'
+                ORDER BY m.name, ti.cid;
+            """)
+
+            for table_name, col_name, col_type, notnull, default, pk in cursor.fetchall():
+                if table_name not in schema:
+                    schema[table_name] = {
+                        'columns': [],
+                        'row_count': 0,
+                        'sample_data': []
+                    }
+
+                schema[table_name]['columns'].append({
+                    'name': col_name,
+                    'type': col_type,
+                    'notnull': notnull == 1,
+                    'default': default,
+                    'pk': pk == 1
+                })
+
+            if not schema:
+                conn.commit()
+                return schema
+
+            self._fill_row_counts(cursor, schema, exact_counts)
+
+            # Get sample data (first 5 rows per table)
+            for table_name, table_info in schema.items():
+                quoted = table_name.replace('"', '""')
+                cursor.execute(f'SELECT * FROM "{quoted}" LIMIT 5;')
                 sample_rows = cursor.fetchall()
-                
-                # Convert sample rows to list of dicts
-                sample_data = []
+
                 if sample_rows:
-                    # Get column names
-                    col_names = [col[0] for col in cursor.description]
-                    
-                    for row in sample_rows:
-                        sample_data.append(dict(zip(col_names, row)))
-                
-                # Store schema info for this table
-                schema[table_name] = {
-                    'columns': column_info,
-                    'row_count': row_count,
-                    'sample_data': sample_data
+                    # sqlite3.Row carries the column names, so dict() does
+                    # the conversion in C instead of a per-row zip
+                    table_info['sample_data'] = [dict(row) for row in sample_rows]
+
+            # Inverted token index so query->table matching is O(query
+            # tokens) instead of scanning every column of every table.
+            # Stored under a '_'-prefixed key; schema consumers skip those.
+            index = {}
+            for table_name, table_info in schema.items():
+                for token in re.findall(r'\w+', table_name.lower()):
+                    index.setdefault(token, []).append([table_name, None])
+
+                for col in table_info['columns']:
+                    for token in re.findall(r'\w+', col['name'].lower()):
+                        index.setdefault(token, []).append([table_name, col['name']])
+
+                # Column roles don't change for a fixed schema, so
+                # resolve them here instead of per user question
+                table_info['_roles'] = _classify_columns(table_info)
+
+                # Quoted identifier forms, so generated SQL interpolates
+                # schema-validated constants instead of raw names
+                table_info['_quoted'] = '"' + table_name.replace('"', '""') + '"'
+                table_info['_quoted_cols'] = {
+                    col['name']: '"' + col['name'].replace('"', '""') + '"'
+                    for col in table_info['columns']
                 }
-            
+
+            schema['_index'] = index
+
+            conn.commit()
             return schema
-            
+
         except Exception as e:
             print(f"Error extracting schema: {e}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
             return {}
-    
+
+    @staticmethod
+    def _fill_row_counts(cursor, schema, exact_counts):
+        """Populate row_count for every table in the schema dict.
+
+        By default counts are estimated: sqlite_stat1 entries (kept
+        current by ANALYZE) are read first, and the remaining tables use
+        MAX(_ROWID_), which SQLite answers from the B-tree root without
+        a scan. Both are single-page lookups, versus COUNT(*) walking
+        every leaf page of every table.
+        """
+        remaining = set(schema)
+
+        if not exact_counts:
+            # sqlite_stat1 stat strings start with the table's row count
+            try:
+                cursor.execute("SELECT tbl, stat FROM sqlite_stat1 WHERE idx IS NULL;")
+                for table_name, stat in cursor.fetchall():
+                    if table_name in remaining and stat:
+                        try:
+                            schema[table_name]['row_count'] = int(str(stat).split()[0])
+                            remaining.discard(table_name)
+                        except ValueError:
+                            pass
+            except sqlite3.Error:
+                # No ANALYZE has ever run on this database
+                pass
+
+            if remaining:
+                est_query = " UNION ALL ".join(
+                    "SELECT '{0}' AS name, COALESCE(MAX(_ROWID_), 0) FROM \"{1}\"".format(
+                        table_name.replace("'", "''"), table_name.replace('"', '""'))
+                    for table_name in remaining
+                )
+                try:
+                    cursor.execute(est_query)
+                    for table_name, row_count in cursor.fetchall():
+                        schema[table_name]['row_count'] = row_count
+                    return
+                except sqlite3.Error:
+                    # WITHOUT ROWID tables have no _ROWID_; fall through
+                    # to exact counts for whatever is left
+                    pass
+
+        # Exact path: all remaining row counts in a single round-trip
+        count_query = " UNION ALL ".join(
+            "SELECT '{0}' AS name, COUNT(*) FROM \"{1}\"".format(
+                table_name.replace("'", "''"), table_name.replace('"', '""'))
+            for table_name in remaining
+        )
+        cursor.execute(count_query)
+
+        for table_name, row_count in cursor.fetchall():
+            schema[table_name]['row_count'] = row_count
+
     def get_connection(self, db_name):
         """
         Get a database connection by name.
@@ -137,17 +332,51 @@ class DatabaseManager:
         """
         return self.connections.get(db_name)
     
+    @contextmanager
+    def get_conn(self, db_name):
+        """
+        Borrow a pooled connection for the duration of a with-block.
+
+        Usage:
+            with manager.get_conn('mydb') as conn:
+                conn.execute(...)
+        """
+        conn_info = self.connections.get(db_name)
+        if conn_info is None:
+            raise KeyError(f"Unknown database connection: {db_name}")
+
+        conn = conn_info['pool'].get()
+        try:
+            yield conn
+        finally:
+            conn_info['pool'].put(conn)
+
     def close_all(self):
         """Close all database connections."""
         for conn_info in self.connections.values():
             if 'conn' in conn_info and conn_info['conn']:
                 conn_info['conn'].close()
-        
+
+            pool = conn_info.get('pool')
+            if pool:
+                while True:
+                    try:
+                        pool.get_nowait().close()
+                    except queue.Empty:
+                        break
+
         self.connections = {}
 
+# Tables at or below this many cells (rows x columns) are pulled into
+# pandas for health stats; NumPy reductions over columnar blocks beat
+# per-column SQL there. The fetch is a full SELECT *, and the health
+# page analyzes every table, so the bound is deliberately modest —
+# anything larger goes through the single-scan SQL aggregates instead
+SMALL_TABLE_CELLS = 500_000
+
 class SchemaAnalyzer:
     """Analyzes database schemas for health and insights."""
-    
+
     @staticmethod
     def analyze_table_health(conn, table_name, schema_info):
         """
@@ -171,110 +400,333 @@ class SchemaAnalyzer:
         }
         
         try:
+            # Small tables: fetch once and let pandas/NumPy compute the
+            # stats vectorially instead of aggregating in SQL
+            if schema_info['row_count'] * len(schema_info['columns']) <= SMALL_TABLE_CELLS:
+                return SchemaAnalyzer._analyze_health_in_memory(
+                    conn, table_name, schema_info, health_metrics)
+
             cursor = conn.cursor()
-            
-            # Check nulls for each column
+
+            # Build one multi-aggregate query so SQLite scans the table
+            # once instead of several times per column. Column names come
+            # from PRAGMA table_info (so interpolation is safe) and the
+            # statement text is deterministic for a given schema, letting
+            # sqlite3's statement cache reuse the compiled query on
+            # repeated health checks.
+            expressions = []
+            slots = []
+
             for col in schema_info['columns']:
                 col_name = col['name']
-                
-                # Count nulls
-                query = f"SELECT COUNT(*) FROM {table_name} WHERE {col_name} IS NULL;"
-                cursor.execute(query)
-                null_count = cursor.fetchone()[0]
-                health_metrics['null_counts'][col_name] = null_count
-                
+                quoted = '"' + col_name.replace('"', '""') + '"'
+
                 # Check data type distribution
                 col_type = col['type'].lower()
                 health_metrics['data_types'][col_name] = col_type
-                
+
+                # Count nulls
+                expressions.append(f"COUNT(*) - COUNT({quoted})")
+                slots.append((col_name, 'null'))
+
                 # Add data quality checks based on type
                 if 'int' in col_type or col_type == 'integer':
                     # For numeric columns, check min/max/avg
-                    try:
-                        query = f"SELECT MIN({col_name}), MAX({col_name}), AVG({col_name}) FROM {table_name} WHERE {col_name} IS NOT NULL;"
-                        cursor.execute(query)
-                        min_val, max_val, avg_val = cursor.fetchone()
-                        
-                        health_metrics['data_quality'][col_name] = {
-                            'min': min_val,
-                            'max': max_val,
-                            'avg': avg_val
-                        }
-                    except:
-                        pass
-                
+                    expressions.extend([
+                        f"MIN({quoted})",
+                        f"MAX({quoted})",
+                        f"AVG({quoted})"
+                    ])
+                    slots.append((col_name, 'numeric'))
+
                 elif 'char' in col_type or 'text' in col_type or 'varchar' in col_type:
                     # For text columns, check empty strings and length stats
-                    try:
-                        query = f"SELECT COUNT(*) FROM {table_name} WHERE {col_name} = '';"
-                        cursor.execute(query)
-                        empty_count = cursor.fetchone()[0]
-                        
-                        query = f"SELECT MIN(LENGTH({col_name})), MAX(LENGTH({col_name})), AVG(LENGTH({col_name})) FROM {table_name} WHERE {col_name} IS NOT NULL;"
-                        cursor.execute(query)
-                        min_len, max_len, avg_len = cursor.fetchone()
-                        
-                        health_metrics['data_quality'][col_name] = {
-                            'empty_strings': empty_count,
-                            'min_length': min_len,
-                            'max_length': max_len,
-                            'avg_length': avg_len
-                        }
-                    except:
-                        pass
-            
-            # Try to determine last updated timestamp
-            timestamp_columns = [col['name'] for col in schema_info['columns'] 
+                    expressions.extend([
+                        f"COALESCE(SUM(CASE WHEN {quoted} = '' THEN 1 ELSE 0 END), 0)",
+                        f"MIN(LENGTH({quoted}))",
+                        f"MAX(LENGTH({quoted}))",
+                        f"AVG(LENGTH({quoted}))"
+                    ])
+                    slots.append((col_name, 'text'))
+
+            # Fold the last-updated check into the same scan
+            timestamp_columns = [col['name'] for col in schema_info['columns']
                               if any(term in col['name'].lower() for term in ['time', 'date', '_at', 'updated'])]
-            
+
             if timestamp_columns:
-                try:
-                    query = f"SELECT MAX({timestamp_columns[0]}) FROM {table_name};"
-                    cursor.execute(query)
-                    last_updated = cursor.fetchone()[0]
-                    
-                    if last_updated:
-                        health_metrics['last_updated'] = last_updated
-                except:
-                    pass
-            
+                quoted = '"' + timestamp_columns[0].replace('"', '""') + '"'
+                expressions.append(f"MAX({quoted})")
+                slots.append((timestamp_columns[0], 'last_updated'))
+
+            if not expressions:
+                return health_metrics
+
+            quoted_table = '"' + table_name.replace('"', '""') + '"'
+            cursor.execute(f"SELECT {', '.join(expressions)} FROM {quoted_table};")
+            row = cursor.fetchone()
+
+            # Map the single result row back onto the metrics dict
+            pos = 0
+            for col_name, kind in slots:
+                if kind == 'null':
+                    health_metrics['null_counts'][col_name] = row[pos]
+                    pos += 1
+                elif kind == 'numeric':
+                    min_val, max_val, avg_val = row[pos:pos + 3]
+                    health_metrics['data_quality'][col_name] = {
+                        'min': min_val,
+                        'max': max_val,
+                        'avg': avg_val
+                    }
+                    pos += 3
+                elif kind == 'text':
+                    empty_count, min_len, max_len, avg_len = row[pos:pos + 4]
+                    health_metrics['data_quality'][col_name] = {
+                        'empty_strings': empty_count,
+                        'min_length': min_len,
+                        'max_length': max_len,
+                        'avg_length': avg_len
+                    }
+                    pos += 4
+                elif kind == 'last_updated':
+                    if row[pos]:
+                        health_metrics['last_updated'] = row[pos]
+                    pos += 1
+
             return health_metrics
-            
+
         except Exception as e:
             print(f"Error analyzing table health: {e}")
             return health_metrics
 
+    @staticmethod
+    def _analyze_health_in_memory(conn, table_name, schema_info, health_metrics):
+        """Compute health metrics from a single in-memory fetch of the table."""
+        quoted_table = '"' + table_name.replace('"', '""') + '"'
+        df = pd.read_sql_query(f"SELECT * FROM {quoted_table};", conn)
+
+        null_counts = df.isna().sum()
+
+        for col in schema_info['columns']:
+            col_name = col['name']
+            col_type = col['type'].lower()
+            health_metrics['data_types'][col_name] = col_type
+
+            if col_name not in df.columns:
+                continue
+
+            health_metrics['null_counts'][col_name] = int(null_counts[col_name])
+            series = df[col_name]
+
+            if 'int' in col_type or col_type == 'integer':
+                values = series.dropna()
+                if len(values):
+                    health_metrics['data_quality'][col_name] = {
+                        'min': values.min(),
+                        'max': values.max(),
+                        'avg': values.mean()
+                    }
+
+            elif 'char' in col_type or 'text' in col_type or 'varchar' in col_type:
+                values = series.dropna().astype(str)
+                lengths = values.str.len()
+                health_metrics['data_quality'][col_name] = {
+                    'empty_strings': int((values == '').sum()),
+                    'min_length': lengths.min() if len(lengths) else None,
+                    'max_length': lengths.max() if len(lengths) else None,
+                    'avg_length': lengths.mean() if len(lengths) else None
+                }
+
+        # Last-updated check from the same frame
+        timestamp_columns = [col['name'] for col in schema_info['columns']
+                          if any(term in col['name'].lower() for term in ['time', 'date', '_at', 'updated'])]
+
+        if timestamp_columns and timestamp_columns[0] in df.columns:
+            last_updated = df[timestamp_columns[0]].max()
+            if pd.notna(last_updated):
+                health_metrics['last_updated'] = last_updated
+
+        return health_metrics
+
+# Precompiled patterns and keyword sets for the NL->SQL hot path; these
+# are scanned on every user query, so avoid re-building them per call
+_LIMIT_RE = re.compile(r'(?:top|first|highest|best)\s+(\d+)|(\d+)\s+(?:top|first|highest|best)')
+_TIME_KEYWORDS = frozenset(['time', 'date', 'day', 'month', 'year', 'created', 'updated', 'at'])
+_CATEGORY_KEYWORDS = frozenset(['type', 'category', 'name', 'status', 'level', 'tier', 'group', 'department'])
+_VALUE_KEYWORDS = frozenset(['count', 'amount', 'value', 'price', 'cost', 'quantity', 'num', 'total', 'sum'])
+_ENTITY_KEYWORDS = ('user', 'customer', 'product', 'employee', 'account', 'item', 'client')
+_TOP_KEYWORDS = frozenset(['top', 'highest', 'best'])
+
+# Static query templates for common question types; shared by all
+# QueryGenerator instances instead of being rebuilt per construction
+_QUERY_TEMPLATES = {
+    'trend': {
+        'patterns': ['trend', 'over time', 'by month', 'by day', 'timeseries'],
+        'template': "SELECT {time_column}, {agg_func}({value_column}) as value FROM {table} GROUP BY {time_column} ORDER BY {time_column};"
+    },
+    'distribution': {
+        'patterns': ['distribution', 'breakdown', 'by category', 'percentage', 'proportion'],
+        'template': "SELECT {category_column}, COUNT(*) as count FROM {table} GROUP BY {category_column} ORDER BY count DESC;"
+    },
+    'top': {
+        'patterns': ['top', 'highest', 'most', 'best'],
+        'template': "SELECT {entity_column}, {agg_func}({value_column}) as value FROM {table} GROUP BY {entity_column} ORDER BY value DESC LIMIT {limit};"
+    },
+    'comparison': {
+        'patterns': ['compare', 'versus', 'against', 'difference'],
+        'template': "SELECT {category_column}, {agg_func}({value_column}) as value FROM {table} GROUP BY {category_column} ORDER BY value DESC;"
+    },
+    'aggregate': {
+        'patterns': ['total', 'sum', 'average', 'count', 'min', 'max'],
+        'template': "SELECT {agg_func}({value_column}) as value FROM {table} WHERE {where_clause};"
+    }
+}
+
+# Single-alternation classifier over the template patterns; the named
+# group that matches tells us the query type
+_TEMPLATE_CLASSIFIER = re.compile('|'.join(
+    '(?P<{0}>{1})'.format(qtype, '|'.join(map(re.escape, info['patterns'])))
+    for qtype, info in _QUERY_TEMPLATES.items()
+))
+
+def _lowered_columns(schema_info):
+    """Lowercased column metadata for a table, computed once and cached.
+
+    Returns (col, name_lower, type_lower, name_search) tuples, where
+    name_search has underscores replaced by spaces for matching against
+    query text. The identify helpers otherwise re-lower every column
+    name on every call, which is quadratic across tables and queries.
+    """
+    cached = schema_info.get('_cols_lower')
+    if cached is None:
+        cached = [(col, col['name'].lower(), col['type'].lower(),
+                   col['name'].lower().replace('_', ' '))
+                  for col in schema_info['columns']]
+        schema_info['_cols_lower'] = cached
+    return cached
+
+def _find_time_column(schema_info):
+    """Scan a table for a timestamp/date column."""
+    for col, col_name, _col_type, _search in _lowered_columns(schema_info):
+        if any(keyword in col_name for keyword in _TIME_KEYWORDS):
+            return col['name']
+
+    return None
+
+def _find_category_column(schema_info):
+    """Scan a table for a categorical column."""
+    # First try columns with category-like names
+    for col, col_name, _col_type, _search in _lowered_columns(schema_info):
+        if any(keyword in col_name for keyword in _CATEGORY_KEYWORDS):
+            return col['name']
+
+    # Then try any text column that's not a timestamp
+    for col, col_name, col_type, _search in _lowered_columns(schema_info):
+        if ('char' in col_type or 'text' in col_type) and not any(keyword in col_name for keyword in _TIME_KEYWORDS):
+            return col['name']
+
+    # Fallback to any non-primary key
+    for col in schema_info['columns']:
+        if not col['pk']:
+            return col['name']
+
+    # Last resort: first column
+    return schema_info['columns'][0]['name'] if schema_info['columns'] else None
+
+def _find_numeric_column(schema_info):
+    """Scan a table for a numeric column."""
+    # First try columns with value-like names
+    for col, col_name, _col_type, _search in _lowered_columns(schema_info):
+        if any(keyword in col_name for keyword in _VALUE_KEYWORDS):
+            return col['name']
+
+    # Then try any numeric column that's not a primary key
+    for col, _col_name, col_type, _search in _lowered_columns(schema_info):
+        if ('int' in col_type or 'float' in col_type or 'double' in col_type or 'real' in col_type or 'numeric' in col_type) and not col['pk']:
+            return col['name']
+
+    # Fallback to COUNT(*)
+    return '*'
+
+def _find_default_entity_column(schema_info):
+    """Scan a table for an entity column, ignoring query context."""
+    cols_lower = _lowered_columns(schema_info)
+
+    # Any ID column that references a known entity
+    for entity in _ENTITY_KEYWORDS:
+        for col, col_name, _col_type, _search in cols_lower:
+            if f"{entity}_id" in col_name:
+                return col['name']
+
+    # Otherwise a name or description column
+    for col, col_name, _col_type, _search in cols_lower:
+        if 'name' in col_name or 'title' in col_name or 'description' in col_name:
+            return col['name']
+
+    # Fallback to the primary key
+    for col in schema_info['columns']:
+        if col['pk']:
+            return col['name']
+
+    # Last resort: first column
+    return schema_info['columns'][0]['name'] if schema_info['columns'] else None
+
+def _quoted_table(table_name, table_info):
+    """Quoted form of a table name, cached on the table's schema dict."""
+    quoted = table_info.get('_quoted')
+    if quoted is None:
+        quoted = '"' + table_name.replace('"', '""') + '"'
+        table_info['_quoted'] = quoted
+    return quoted
+
+def _quoted_column(table_info, column_name):
+    """Quoted form of a column name; '*' and aliases pass through."""
+    if column_name == '*':
+        return column_name
+
+    quoted_cols = table_info.get('_quoted_cols')
+    if quoted_cols is None:
+        quoted_cols = {col['name']: '"' + col['name'].replace('"', '""') + '"'
+                       for col in table_info['columns']}
+        table_info['_quoted_cols'] = quoted_cols
+
+    return quoted_cols.get(column_name, column_name)
+
+def _classify_columns(table_info):
+    """Resolve each column role for a table once, at schema-extract time.
+
+    The roles are fixed for a fixed schema, so the per-question
+    _identify_* helpers can read the cached answers instead of
+    re-running keyword scans over every column.
+    """
+    return {
+        'time': _find_time_column(table_info),
+        'category': _find_category_column(table_info),
+        'numeric': _find_numeric_column(table_info),
+        'entity': _find_default_entity_column(table_info)
+    }
+
 class QueryGenerator:
     """Generates SQL queries from natural language."""
     
     def __init__(self):
         # Load query templates
         self.query_templates = self._load_templates()
+        self._classifier = _TEMPLATE_CLASSIFIER
+
+        # Classifier group name -> generator method; replaces the
+        # if/elif ladder in generate_sql with one dict lookup
+        self._dispatch = {
+            'trend': self._generate_trend_query,
+            'distribution': self._generate_distribution_query,
+            'top': self._generate_top_query,
+            'comparison': self._generate_comparison_query,
+            'aggregate': self._generate_aggregate_query
+        }
     
     def _load_templates(self):
         """Load query templates for common question types."""
-        return {
-            'trend': {
-                'patterns': ['trend', 'over time', 'by month', 'by day', 'timeseries'],
-                'template': "SELECT {time_column}, {agg_func}({value_column}) as value FROM {table} GROUP BY {time_column} ORDER BY {time_column};"
-            },
-            'distribution': {
-                'patterns': ['distribution', 'breakdown', 'by category', 'percentage', 'proportion'],
-                'template': "SELECT {category_column}, COUNT(*) as count FROM {table} GROUP BY {category_column} ORDER BY count DESC;"
-            },
-            'top': {
-                'patterns': ['top', 'highest', 'most', 'best'],
-                'template': "SELECT {entity_column}, {agg_func}({value_column}) as value FROM {table} GROUP BY {entity_column} ORDER BY value DESC LIMIT {limit};"
-            },
-            'comparison': {
-                'patterns': ['compare', 'versus', 'against', 'difference'],
-                'template': "SELECT {category_column}, {agg_func}({value_column}) as value FROM {table} GROUP BY {category_column} ORDER BY value DESC;"
-            },
-            'aggregate': {
-                'patterns': ['total', 'sum', 'average', 'count', 'min', 'max'],
-                'template': "SELECT {agg_func}({value_column}) as value FROM {table} WHERE {where_clause};"
-            }
-        }
+        return _QUERY_TEMPLATES
     
     def generate_sql(self, query_text, schema):
         """
@@ -287,199 +739,150 @@ class QueryGenerator:
         Returns:
             dict: SQL query information
         """
-        # Convert query to lowercase for pattern matching
+        # Lowercase once; all helpers work on the pre-lowered query
         query_lower = query_text.lower()
-        
-        # Identify query type
-        query_type = None
-        for qtype, info in self.query_templates.items():
-            if any(pattern in query_lower for pattern in info['patterns']):
-                query_type = qtype
-                break
-        
-        # If no pattern matched, use generic approach
-        if query_type is None:
-            return self._generate_generic_query(query_text, schema)
-        
-        # For each query type, implement specific logic
-        if query_type == 'trend':
-            return self._generate_trend_query(query_text, schema)
-        elif query_type == 'distribution':
-            return self._generate_distribution_query(query_text, schema)
-        elif query_type == 'top':
-            return self._generate_top_query(query_text, schema)
-        elif query_type == 'comparison':
-            return self._generate_comparison_query(query_text, schema)
-        elif query_type == 'aggregate':
-            return self._generate_aggregate_query(query_text, schema)
-        
-        # Fallback to generic approach
-        return self._generate_generic_query(query_text, schema)
+
+        # Identify query type in one pass, then dispatch through the
+        # handler table; unmatched queries use the generic approach
+        match = self._classifier.search(query_lower)
+
+        if match is None:
+            return self._generate_generic_query(query_lower, schema)
+
+        return self._dispatch[match.lastgroup](query_lower, schema)
     
-    def _identify_relevant_table(self, query, schema):
+    def _identify_relevant_table(self, query_lower, schema):
         """Identify the most relevant table for the query."""
         # Simple approach: check for table name mentions
-        for table_name in schema.keys():
-            # Convert to lowercase and remove underscores for matching
-            table_search = table_name.lower().replace('_', ' ')
-            
-            if table_search in query.lower():
-                return table_name
-        
-        # If no direct mention, try to match based on column names
-        # Count column mentions for each table
-        table_scores = {table: 0 for table in schema.keys()}
-        
         for table_name, table_info in schema.items():
-            for col in table_info['columns']:
-                col_search = col['name'].lower().replace('_', ' ')
-                if col_search in query.lower():
+            if table_name.startswith('_'):
+                # Metadata entries like '_index', not tables
+                continue
+
+            # Convert to lowercase and remove underscores for matching,
+            # caching the search form alongside the table info
+            table_search = table_info.get('_search_name')
+            if table_search is None:
+                table_search = table_name.lower().replace('_', ' ')
+                table_info['_search_name'] = table_search
+
+            if table_search in query_lower:
+                return table_name
+
+        # If no direct mention, tally query tokens against the inverted
+        # index built at schema-extraction time
+        index = schema.get('_index')
+
+        if index is not None:
+            table_scores = Counter()
+            for token in re.findall(r'\w+', query_lower):
+                for table_name, _column in index.get(token, ()):
                     table_scores[table_name] += 1
-        
-        # Return the table with the most column mentions
-        if any(score > 0 for score in table_scores.values()):
-            return max(table_scores.items(), key=lambda x: x[1])[0]
-        
+
+            if table_scores:
+                return table_scores.most_common(1)[0][0]
+        else:
+            # Schemas built elsewhere carry no index; fall back to the
+            # per-column scan
+            table_scores = {table: 0 for table in schema.keys()}
+
+            for table_name, table_info in schema.items():
+                for _col, _name_lower, _type_lower, col_search in _lowered_columns(table_info):
+                    if col_search in query_lower:
+                        table_scores[table_name] += 1
+
+            # Return the table with the most column mentions
+            if any(score > 0 for score in table_scores.values()):
+                return max(table_scores.items(), key=lambda x: x[1])[0]
+
         # If still no match, return the table with the most rows (most significant)
-        if schema:
-            return max(schema.items(), key=lambda x: x[1]['row_count'])[0]
-        
+        tables = [(name, info) for name, info in schema.items() if not name.startswith('_')]
+        if tables:
+            return max(tables, key=lambda x: x[1]['row_count'])[0]
+
         return None
     
     def _identify_time_column(self, schema_info):
         """Identify a timestamp/date column in a table."""
-        time_keywords = ['time', 'date', 'day', 'month', 'year', 'created', 'updated', 'at']
-        
-        for col in schema_info['columns']:
-            col_name = col['name'].lower()
-            if any(keyword in col_name for keyword in time_keywords):
-                return col['name']
-        
-        return None
+        roles = schema_info.get('_roles')
+        if roles is not None:
+            return roles['time']
+
+        return _find_time_column(schema_info)
     
     def _identify_category_column(self, schema_info):
         """Identify a categorical column in a table."""
-        # Look for textual columns that aren't timestamps
-        time_keywords = ['time', 'date', 'day', 'month', 'year', 'created', 'updated', 'at']
-        category_keywords = ['type', 'category', 'name', 'status', 'level', 'tier', 'group', 'department']
-        
-        # First try columns with category-like names
-        for col in schema_info['columns']:
-            col_name = col['name'].lower()
-            if any(keyword in col_name for keyword in category_keywords):
-                return col['name']
-        
-        # Then try any text column that's not a timestamp
-        for col in schema_info['columns']:
-            col_name = col['name'].lower()
-            col_type = col['type'].lower()
-            
-            if ('char' in col_type or 'text' in col_type) and not any(keyword in col_name for keyword in time_keywords):
-                return col['name']
-        
-        # Fallback to any non-primary key
-        for col in schema_info['columns']:
-            if not col['pk']:
-                return col['name']
-        
-        # Last resort: first column
-        return schema_info['columns'][0]['name'] if schema_info['columns'] else None
+        roles = schema_info.get('_roles')
+        if roles is not None:
+            return roles['category']
+
+        return _find_category_column(schema_info)
     
     def _identify_numeric_column(self, schema_info):
         """Identify a numeric column in a table."""
-        # Look for numeric columns with value-like names
-        value_keywords = ['count', 'amount', 'value', 'price', 'cost', 'quantity', 'num', 'total', 'sum']
-        
-        # First try columns with value-like names
-        for col in schema_info['columns']:
-            col_name = col['name'].lower()
-            if any(keyword in col_name for keyword in value_keywords):
-                return col['name']
-        
-        # Then try any numeric column that's not a primary key
-        for col in schema_info['columns']:
-            col_type = col['type'].lower()
-            
-            if ('int' in col_type or 'float' in col_type or 'double' in col_type or 'real' in col_type or 'numeric' in col_type) and not col['pk']:
-                return col['name']
-        
-        # Fallback to COUNT(*)
-        return '*'
+        roles = schema_info.get('_roles')
+        if roles is not None:
+            return roles['numeric']
+
+        return _find_numeric_column(schema_info)
     
-    def _identify_entity_column(self, schema_info, query):
+    def _identify_entity_column(self, schema_info, query_lower):
         """Identify an entity column based on query."""
-        entity_keywords = ['user', 'customer', 'product', 'employee', 'account', 'item', 'client']
-        
-        # First check if any entity keywords are in the query
-        query_entities = [kw for kw in entity_keywords if kw in query.lower()]
-        
+        # First check if any entity keywords are in the query; this part
+        # depends on the question, so it stays live
+        query_entities = [kw for kw in _ENTITY_KEYWORDS if kw in query_lower]
+
         if query_entities:
             # Look for columns matching the entities found in query
             for entity in query_entities:
-                for col in schema_info['columns']:
-                    col_name = col['name'].lower()
+                for col, col_name, _col_type, _search in _lowered_columns(schema_info):
                     if entity in col_name:
                         return col['name']
-        
-        # Fallback to any ID column that references these entities
-        for entity in entity_keywords:
-            for col in schema_info['columns']:
-                col_name = col['name'].lower()
-                if f"{entity}_id" in col_name:
-                    return col['name']
-        
-        # If no specific entity found, return a name or description column
-        for col in schema_info['columns']:
-            col_name = col['name'].lower()
-            if 'name' in col_name or 'title' in col_name or 'description' in col_name:
-                return col['name']
-        
-        # Fallback to the primary key
-        for col in schema_info['columns']:
-            if col['pk']:
-                return col['name']
-        
-        # Last resort: first column
-        return schema_info['columns'][0]['name'] if schema_info['columns'] else None
+
+        # The query-independent fallback chain is precomputed per table
+        roles = schema_info.get('_roles')
+        if roles is not None:
+            return roles['entity']
+
+        return _find_default_entity_column(schema_info)
     
-    def _identify_aggregation_function(self, query):
+    def _identify_aggregation_function(self, query_lower):
         """Identify the aggregation function to use based on query."""
-        if 'average' in query.lower() or 'avg' in query.lower():
+        if 'average' in query_lower or 'avg' in query_lower:
             return 'AVG'
-        elif 'sum' in query.lower() or 'total' in query.lower():
+        elif 'sum' in query_lower or 'total' in query_lower:
             return 'SUM'
-        elif 'minimum' in query.lower() or 'min' in query.lower():
+        elif 'minimum' in query_lower or 'min' in query_lower:
             return 'MIN'
-        elif 'maximum' in query.lower() or 'max' in query.lower():
+        elif 'maximum' in query_lower or 'max' in query_lower:
             return 'MAX'
-        elif 'count' in query.lower() or 'how many' in query.lower() or 'number of' in query.lower():
+        elif 'count' in query_lower or 'how many' in query_lower or 'number of' in query_lower:
             return 'COUNT'
-        
+
         # Default to COUNT
         return 'COUNT'
-    
-    def _extract_limit(self, query):
+
+    def _extract_limit(self, query_lower):
         """Extract a LIMIT value from the query."""
         # Look for patterns like "top 10" or "5 highest"
-        number_pattern = r'(?:top|first|highest|best)\s+(\d+)|(\d+)\s+(?:top|first|highest|best)'
-        match = re.search(number_pattern, query.lower())
-        
+        match = _LIMIT_RE.search(query_lower)
+
         if match:
             # Return the first non-None capturing group
             for group in match.groups():
                 if group:
                     return int(group)
-        
+
         # Default to 10 for top queries
-        if any(kw in query.lower() for kw in ['top', 'highest', 'best']):
+        if any(kw in query_lower for kw in _TOP_KEYWORDS):
             return 10
-        
+
         return None
     
-    def _generate_trend_query(self, query, schema):
+    def _generate_trend_query(self, query_lower, schema):
         """Generate a trend analysis query."""
         # Identify relevant table
-        table_name = self._identify_relevant_table(query, schema)
+        table_name = self._identify_relevant_table(query_lower, schema)
         
         if not table_name:
             return {
@@ -500,19 +903,24 @@ class QueryGenerator:
         
         # Identify value column
         value_column = self._identify_numeric_column(table_info)
-        agg_func = self._identify_aggregation_function(query)
-        
+        agg_func = self._identify_aggregation_function(query_lower)
+
+        # Interpolate cached quoted identifiers only
+        quoted_table = _quoted_table(table_name, table_info)
+        quoted_time = _quoted_column(table_info, time_column)
+        quoted_value = _quoted_column(table_info, value_column)
+
         # Format the time column for grouping (if it's a timestamp/date)
-        time_format = time_column
+        time_format = quoted_time
         if any(kw in time_column.lower() for kw in ['time', 'date', '_at']):
-            time_format = f"strftime('%Y-%m', {time_column})"
-        
+            time_format = f"strftime('%Y-%m', {quoted_time})"
+
         # Build the query
         sql_query = f"""
-        SELECT {time_format} as time_period, {agg_func}({value_column}) as value 
-        FROM {table_name} 
-        WHERE {time_column} IS NOT NULL
-        GROUP BY time_period 
+        SELECT {time_format} as time_period, {agg_func}({quoted_value}) as value
+        FROM {quoted_table}
+        WHERE {quoted_time} IS NOT NULL
+        GROUP BY time_period
         ORDER BY time_period;
         """
         
@@ -526,10 +934,10 @@ class QueryGenerator:
             'y_axis': 'value'
         }
     
-    def _generate_distribution_query(self, query, schema):
+    def _generate_distribution_query(self, query_lower, schema):
         """Generate a distribution analysis query."""
         # Identify relevant table
-        table_name = self._identify_relevant_table(query, schema)
+        table_name = self._identify_relevant_table(query_lower, schema)
         
         if not table_name:
             return {
@@ -549,28 +957,31 @@ class QueryGenerator:
             }
         
         # Build the query
+        quoted_table = _quoted_table(table_name, table_info)
+        quoted_category = _quoted_column(table_info, category_column)
+
         sql_query = f"""
-        SELECT {category_column}, COUNT(*) as count 
-        FROM {table_name} 
-        WHERE {category_column} IS NOT NULL
-        GROUP BY {category_column} 
+        SELECT {quoted_category}, COUNT(*) as count
+        FROM {quoted_table}
+        WHERE {quoted_category} IS NOT NULL
+        GROUP BY {quoted_category}
         ORDER BY count DESC;
         """
         
         return {
             'success': True,
             'query': sql_query,
-            'visualization_type': 'pie' if 'percentage' in query.lower() else 'bar',
+            'visualization_type': 'pie' if 'percentage' in query_lower else 'bar',
             'explanation': f"Analyzing distribution of {category_column} in {table_name}",
             'table': table_name,
             'x_axis': category_column,
             'y_axis': 'count'
         }
     
-    def _generate_top_query(self, query, schema):
+    def _generate_top_query(self, query_lower, schema):
         """Generate a top N query."""
         # Identify relevant table
-        table_name = self._identify_relevant_table(query, schema)
+        table_name = self._identify_relevant_table(query_lower, schema)
         
         if not table_name:
             return {
@@ -581,7 +992,7 @@ class QueryGenerator:
         table_info = schema[table_name]
         
         # Identify entity column
-        entity_column = self._identify_entity_column(table_info, query)
+        entity_column = self._identify_entity_column(table_info, query_lower)
         
         if not entity_column:
             return {
@@ -591,16 +1002,20 @@ class QueryGenerator:
         
         # Identify value column and aggregation
         value_column = self._identify_numeric_column(table_info)
-        agg_func = self._identify_aggregation_function(query)
+        agg_func = self._identify_aggregation_function(query_lower)
         
         # Extract limit
-        limit = self._extract_limit(query)
-        
+        limit = self._extract_limit(query_lower)
+
         # Build the query
+        quoted_table = _quoted_table(table_name, table_info)
+        quoted_entity = _quoted_column(table_info, entity_column)
+        quoted_value = _quoted_column(table_info, value_column)
+
         sql_query = f"""
-        SELECT {entity_column}, {agg_func}({value_column}) as value 
-        FROM {table_name} 
-        GROUP BY {entity_column} 
+        SELECT {quoted_entity}, {agg_func}({quoted_value}) as value
+        FROM {quoted_table}
+        GROUP BY {quoted_entity}
         ORDER BY value DESC
         LIMIT {limit or 10};
         """
@@ -615,10 +1030,10 @@ class QueryGenerator:
             'y_axis': 'value'
         }
     
-    def _generate_comparison_query(self, query, schema):
+    def _generate_comparison_query(self, query_lower, schema):
         """Generate a comparison query."""
         # Identify relevant table
-        table_name = self._identify_relevant_table(query, schema)
+        table_name = self._identify_relevant_table(query_lower, schema)
         
         if not table_name:
             return {
@@ -639,13 +1054,17 @@ class QueryGenerator:
         
         # Identify value column and aggregation
         value_column = self._identify_numeric_column(table_info)
-        agg_func = self._identify_aggregation_function(query)
+        agg_func = self._identify_aggregation_function(query_lower)
         
         # Build the query
+        quoted_table = _quoted_table(table_name, table_info)
+        quoted_category = _quoted_column(table_info, category_column)
+        quoted_value = _quoted_column(table_info, value_column)
+
         sql_query = f"""
-        SELECT {category_column}, {agg_func}({value_column}) as value 
-        FROM {table_name} 
-        GROUP BY {category_column} 
+        SELECT {quoted_category}, {agg_func}({quoted_value}) as value
+        FROM {quoted_table}
+        GROUP BY {quoted_category}
         ORDER BY value DESC;
         """
         
@@ -659,10 +1078,10 @@ class QueryGenerator:
             'y_axis': 'value'
         }
     
-    def _generate_aggregate_query(self, query, schema):
+    def _generate_aggregate_query(self, query_lower, schema):
         """Generate an aggregate query."""
         # Identify relevant table
-        table_name = self._identify_relevant_table(query, schema)
+        table_name = self._identify_relevant_table(query_lower, schema)
         
         if not table_name:
             return {
@@ -2,26 +2,60 @@
 Utility functions for generating insights from query results.
 """
 
+import asyncio
+import json
+import re
+from functools import lru_cache
+
 import pandas as pd
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
 from .llm_utils import initialize_claude
 
-def generate_insights(query, sql_query, result_df):
-    """Generate insights from query results using Claude."""
+# Bound how much of the result frame gets formatted into the prompt;
+# to_string cost (and token usage) would otherwise scale with frame width
+MAX_PREVIEW_COLS = 16
+MAX_PREVIEW_COLWIDTH = 64
+
+# First chart keyword after the VISUALIZATION: tag wins; one scan
+# instead of four sequential substring tests
+_VIZ_RE = re.compile(r'\b(line|bar|pie|scatter)\b')
+
+@lru_cache(maxsize=1)
+def _claude():
+    """Shared Claude client; constructing one per call rebuilds the HTTP session."""
+    return initialize_claude()
+
+async def generate_insights_async(query, sql_query, result_df=None, preview_df=None, shape=None):
+    """Generate insights from query results using Claude, streaming the response.
+
+    Callers holding a large frame should pass preview_df=df.head(10) and
+    shape=df.shape instead of result_df, so the full frame never needs to
+    stay alive for the duration of the LLM call.
+    """
     try:
-        llm = initialize_claude()
-        
+        llm = _claude()
+
         # Prepare a summary of the data
-        num_rows = len(result_df)
-        num_cols = len(result_df.columns)
-        column_info = ", ".join(result_df.columns)
-        
-        # For large dataframes, provide a sample
+        if shape is None:
+            shape = result_df.shape
+        num_rows, num_cols = shape
+
+        if preview_df is None:
+            preview_df = result_df
+
+        # Format at most 10 rows and MAX_PREVIEW_COLS columns
+        preview_df = preview_df.iloc[:10, :MAX_PREVIEW_COLS]
+
+        column_info = ", ".join(preview_df.columns)
+        if num_cols > MAX_PREVIEW_COLS:
+            column_info += ", ..."
+
+        data_sample = preview_df.to_string(max_colwidth=MAX_PREVIEW_COLWIDTH)
+
         if num_rows > 10:
-            data_sample = result_df.head(10).to_string()
             data_description = f"The result has {num_rows} rows and {num_cols} columns: {column_info}. Here's a sample of the first 10 rows:\n{data_sample}"
         else:
-            data_description = f"The result has {num_rows} rows and {num_cols} columns: {column_info}. Here's the complete result:\n{result_df.to_string()}"
+            data_description = f"The result has {num_rows} rows and {num_cols} columns: {column_info}. Here's the complete result:\n{data_sample}"
         
         # Create a prompt for insight generation
         messages = [
@@ -38,23 +72,24 @@ def generate_insights(query, sql_query, result_df):
             Please provide key insights and recommend a visualization type.""")
         ]
         
-        # Get insights from Claude
-        response = llm.invoke(messages)
-        insights_text = response.content
-        
-        # Extract visualization type from response
-        viz_type = 'table'  # Default
-        if "VISUALIZATION:" in insights_text:
-            viz_section = insights_text.split("VISUALIZATION:")[1].lower()
-            if "line" in viz_section:
-                viz_type = 'line'
-            elif "bar" in viz_section:
-                viz_type = 'bar'
-            elif "pie" in viz_section:
-                viz_type = 'pie'
-            elif "scatter" in viz_section:
-                viz_type = 'scatter'
-        
+        # Stream the response so the LLM round-trip doesn't block the
+        # event loop. The visualization tag resolves as soon as it
+        # streams past, but the whole response is still consumed: the
+        # insights text is shown to users and must not be truncated
+        insights_text = ""
+        viz_type = None
+
+        async for chunk in llm.astream(messages):
+            insights_text += chunk.content
+
+            if viz_type is None and "VISUALIZATION:" in insights_text:
+                resolved = _extract_visualization_type(insights_text)
+                if resolved != 'table':
+                    viz_type = resolved
+
+        if viz_type is None:
+            viz_type = _extract_visualization_type(insights_text)
+
         return {
             'insights': insights_text,
             'visualization_type': viz_type
@@ -65,26 +100,126 @@ def generate_insights(query, sql_query, result_df):
             'visualization_type': 'table'
         }
 
+def generate_insights(query, sql_query, result_df=None, preview_df=None, shape=None):
+    """Generate insights from query results using Claude."""
+    return asyncio.run(generate_insights_async(query, sql_query, result_df,
+                                               preview_df=preview_df, shape=shape))
+
+def _describe_item(index, query, sql_query, preview_df, shape):
+    """Format one (query, sql, preview) triple for the batch prompt."""
+    num_rows, num_cols = shape
+    preview_df = preview_df.iloc[:10, :MAX_PREVIEW_COLS]
+
+    column_info = ", ".join(preview_df.columns)
+    if num_cols > MAX_PREVIEW_COLS:
+        column_info += ", ..."
+
+    data_sample = preview_df.to_string(max_colwidth=MAX_PREVIEW_COLWIDTH)
+
+    return (f"Item {index}:\n"
+            f"User query: {query}\n"
+            f"SQL query: {sql_query}\n"
+            f"The result has {num_rows} rows and {num_cols} columns: {column_info}. "
+            f"Here's a sample of the first 10 rows:\n{data_sample}")
+
+def generate_insights_batch(items):
+    """Generate insights for several query results in one LLM call.
+
+    Each item is a dict with 'query', 'sql_query' and either 'result_df'
+    or 'preview_df' plus 'shape'. Sending all panels of a dashboard in a
+    single prompt amortizes the network round-trip across them; callers
+    that want streaming for a single result should use generate_insights.
+
+    Returns:
+        list: One {'insights', 'visualization_type'} dict per item, in order.
+    """
+    if not items:
+        return []
+
+    try:
+        llm = _claude()
+
+        sections = []
+        for i, item in enumerate(items):
+            result_df = item.get('result_df')
+            preview_df = item.get('preview_df')
+            if preview_df is None:
+                preview_df = result_df
+
+            shape = item.get('shape')
+            if shape is None:
+                shape = result_df.shape
+
+            sections.append(_describe_item(i, item['query'], item['sql_query'],
+                                           preview_df, shape))
+
+        messages = [
+            SystemMessage(content="""You are a data analyst providing insights on query results.
+            For EACH numbered item, analyze the data and provide 2-3 key insights,
+            and recommend the best visualization type: line, bar, pie, scatter, or table.
+            Respond with ONLY a JSON array, one object per item in order, of the form
+            [{"insights": "...", "visualization": "..."}, ...]. No other text."""),
+            HumanMessage(content="\n\n".join(sections))
+        ]
+
+        response = llm.invoke(messages)
+
+        # Strip markdown fences if the model added them
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', response.content.strip())
+        parsed = json.loads(text)
+
+        results = []
+        for i in range(len(items)):
+            entry = parsed[i] if i < len(parsed) else {}
+            viz_type = str(entry.get('visualization', 'table')).lower()
+            if viz_type not in ('line', 'bar', 'pie', 'scatter'):
+                viz_type = 'table'
+
+            results.append({
+                'insights': entry.get('insights', ''),
+                'visualization_type': viz_type
+            })
+
+        return results
+    except Exception as e:
+        return [{
+            'insights': f"Error generating insights: {str(e)}",
+            'visualization_type': 'table'
+        } for _ in items]
+
+def _extract_visualization_type(insights_text):
+    """Extract the recommended visualization type from the response text."""
+    viz_type = 'table'  # Default
+    if "VISUALIZATION:" in insights_text:
+        # maxsplit=1 so free-text mentions of the tag don't cost extra splits
+        viz_section = insights_text.split("VISUALIZATION:", 1)[1].lower()
+        match = _VIZ_RE.search(viz_section)
+        if match:
+            viz_type = match.group(1)
+
+    return viz_type
+
 def determine_visualization_type(insights, df):
     """Extract visualization type recommendation from insights."""
     # This function is a fallback if the visualization type wasn't properly extracted
     # from the insights response
     
-    if len(df) == 0:
+    # Read the shape once instead of re-counting per check
+    num_rows, num_cols = df.shape
+
+    if num_rows == 0:
         return 'table'
-    
-    # Default logic based on data structure
-    num_rows = len(df)
-    num_cols = len(df.columns)
-    
+
     # Single value results
     if num_rows == 1 and num_cols == 1:
         return 'value'
-    
+
     # For 2 columns, check if one might be a date/time
     if num_cols >= 2:
-        first_col = df.columns[0]
-        if df[first_col].dtype == 'datetime64[ns]' or 'date' in first_col.lower() or 'time' in first_col.lower():
+        first_col_lower = df.columns[0].lower()
+        # is_datetime64_any_dtype also matches tz-aware timestamps, which
+        # the old string comparison against 'datetime64[ns]' missed
+        if pd.api.types.is_datetime64_any_dtype(df.iloc[:, 0]) or 'date' in first_col_lower or 'time' in first_col_lower:
             return 'line'
     
     # Few categories with numeric values
@@ -1,18 +1,81 @@
 import re
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.tag import pos_tag
+from collections import Counter
 
-# Download NLTK resources if not already downloaded
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-    
+import numpy as np
+
+# Numba is optional: the compiled scoring loop only pays off on very
+# wide schemas, and its call overhead loses to plain Python on small
+# ones, so everything falls back to the Counter path without it
 try:
-    nltk.data.find('taggers/averaged_perceptron_tagger')
-except LookupError:
-    nltk.download('averaged_perceptron_tagger')
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Keyword tuples and precompiled patterns, built once at import; the
+# per-call versions re-allocated lists and recompiled the limit regex
+# on every query
+_TREND_KW = ('trend', 'over time', 'by month', 'by day', 'timeseries')
+_DISTRIBUTION_KW = ('distribution', 'breakdown', 'by category', 'percentage', 'proportion')
+_TOP_KW = ('top', 'highest', 'most', 'best')
+_COMPARISON_KW = ('compare', 'versus', 'against', 'difference')
+_AGGREGATE_KW = ('total', 'sum', 'average', 'count', 'min', 'max')
+
+_TIME_KEYWORDS = ('time', 'date', 'day', 'month', 'year', 'created', 'updated', 'at')
+_CATEGORY_KEYWORDS = ('type', 'category', 'name', 'status', 'level', 'tier', 'group', 'department')
+_VALUE_KEYWORDS = ('count', 'amount', 'value', 'price', 'cost', 'quantity', 'num', 'total', 'sum')
+
+# (keywords, SQL function) pairs scanned in priority order
+_AGG_FUNCTIONS = (
+    (('average', 'avg'), 'AVG'),
+    (('sum', 'total'), 'SUM'),
+    (('minimum', 'min'), 'MIN'),
+    (('maximum', 'max'), 'MAX'),
+    (('count', 'how many', 'number of'), 'COUNT')
+)
+
+_LIMIT_RE = re.compile(r'(?:top|first|highest|best)\s+(\d+)|(\d+)\s+(?:top|first|highest|best)')
+
+# Single combined scan over all category keywords; one pass over the
+# query tags every category that fires, instead of five independent
+# substring scans. The alternation is matched by re's C engine, which
+# serves the same purpose as an Aho-Corasick automaton here.
+_CATEGORY_RE = re.compile('|'.join(
+    '(?P<{0}>{1})'.format(cat, '|'.join(map(re.escape, kws)))
+    for cat, kws in (
+        ('trend', _TREND_KW),
+        ('distribution', _DISTRIBUTION_KW),
+        ('top', _TOP_KW),
+        ('comparison', _COMPARISON_KW),
+        ('aggregate', _AGGREGATE_KW)
+    )
+))
+
+# Per-keyword-set alternations for column-name tests
+_TIME_KW_RE = re.compile('|'.join(map(re.escape, _TIME_KEYWORDS)))
+_CATEGORY_KW_RE = re.compile('|'.join(map(re.escape, _CATEGORY_KEYWORDS)))
+_VALUE_KW_RE = re.compile('|'.join(map(re.escape, _VALUE_KEYWORDS)))
+
+def _match_categories(query_lower):
+    '''Tag every query category that fires, in one scan of the query.'''
+    return {match.lastgroup for match in _CATEGORY_RE.finditer(query_lower)}
+
+# Above this many tables, name matching switches from per-table
+# substring scans (O(tables * query length)) to hashed word shingles;
+# below it the plain scan wins, so small schemas keep the linear path
+_SHINGLE_MIN_TABLES = 20
+_MAX_SHINGLE_WORDS = 4
+
+def _shingle_hashes(words):
+    '''Hashes of every 1..N-word shingle of a word sequence.
+
+    Built once per query; table-name lookups then become hash-set
+    probes instead of substring scans over the whole query.
+    '''
+    hashes = set()
+    for n in range(1, _MAX_SHINGLE_WORDS + 1):
+        for i in range(len(words) - n + 1):
+            hashes.add(hash(words[i:i + n]))
+    return hashes
 
 def nlp_to_sql(query, schema):
     '''
@@ -25,157 +88,268 @@ def nlp_to_sql(query, schema):
     Returns:
         dict: SQL query information
     '''
+    # Lowercase once; every helper below takes the pre-lowered query
     query_lower = query.lower()
-    
-    # Identify keyword patterns
-    is_trend_query = any(kw in query_lower for kw in ['trend', 'over time', 'by month', 'by day', 'timeseries'])
-    is_distribution_query = any(kw in query_lower for kw in ['distribution', 'breakdown', 'by category', 'percentage', 'proportion'])
-    is_top_query = any(kw in query_lower for kw in ['top', 'highest', 'most', 'best'])
-    is_comparison_query = any(kw in query_lower for kw in ['compare', 'versus', 'against', 'difference'])
-    is_aggregate_query = any(kw in query_lower for kw in ['total', 'sum', 'average', 'count', 'min', 'max'])
-    
-    # Determine query type
-    if is_trend_query:
-        return generate_trend_query(query, schema)
-    elif is_distribution_query:
-        return generate_distribution_query(query, schema)
-    elif is_top_query:
-        return generate_top_query(query, schema)
-    elif is_comparison_query:
-        return generate_comparison_query(query, schema)
-    elif is_aggregate_query:
-        return generate_aggregate_query(query, schema)
+
+    # Identify all keyword patterns in a single scan
+    categories = _match_categories(query_lower)
+
+    # Determine query type, keeping the original priority order
+    if 'trend' in categories:
+        return generate_trend_query(query_lower, schema)
+    elif 'distribution' in categories:
+        return generate_distribution_query(query_lower, schema)
+    elif 'top' in categories:
+        return generate_top_query(query_lower, schema)
+    elif 'comparison' in categories:
+        return generate_comparison_query(query_lower, schema)
+    elif 'aggregate' in categories:
+        return generate_aggregate_query(query_lower, schema)
     else:
-        return generate_generic_query(query, schema)
+        return generate_generic_query(query_lower, schema)
     
-def identify_relevant_table(query, schema):
+# Column-token scoring drops into the compiled loop only past this
+# many (table, token) pairs; below it the interpreter loop is faster
+_NUMBA_MIN_PAIRS = 2048
+
+if njit is not None:
+    @njit(cache=True)
+    def _score_pairs(pairs, q_tokens_sorted, scores):
+        '''Tally query-token hits per table over flat int32 pairs.'''
+        for i in range(pairs.shape[0]):
+            token = pairs[i, 1]
+            lo = 0
+            hi = q_tokens_sorted.shape[0]
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if q_tokens_sorted[mid] < token:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < q_tokens_sorted.shape[0] and q_tokens_sorted[lo] == token:
+                scores[pairs[i, 0]] += 1
+
+def _build_token_pairs(schema):
+    '''Encode column-name tokens as a flat (table_id, token_id) array.
+
+    Integer IDs let the scoring loop run over a contiguous int32 array
+    instead of dict lookups, which is what the compiled path needs.
+    '''
+    table_names = [t for t in schema if not t.startswith('_')]
+    token_to_id = {}
+    pairs = []
+
+    for table_id, table_name in enumerate(table_names):
+        for col in schema[table_name]['columns']:
+            for token in re.findall(r'\w+', col['name'].lower()):
+                token_id = token_to_id.setdefault(token, len(token_to_id))
+                pairs.append((table_id, token_id))
+
+    pairs_arr = np.asarray(pairs, dtype=np.int32).reshape(-1, 2)
+    return table_names, token_to_id, pairs_arr
+
+def identify_relevant_table(query_lower, schema):
     '''Identify the most relevant table for the query.'''
-    # Simple approach: check for table name mentions
-    for table_name in schema.keys():
-        # Convert to lowercase and remove underscores for matching
-        table_search = table_name.lower().replace('_', ' ')
-        
-        if table_search in query.lower():
-            return table_name
-    
-    # If no direct mention, try to match based on column names
-    # Count column mentions for each table
-    table_scores = {table: 0 for table in schema.keys()}
-    
-    for table_name, table_info in schema.items():
-        for col in table_info['columns']:
-            col_search = col['name'].lower().replace('_', ' ')
-            if col_search in query.lower():
-                table_scores[table_name] += 1
-    
+    # Search forms are fixed for a fixed schema; build them once and
+    # cache on the schema dict under '_'-prefixed keys
+    table_search_map = schema.get('_table_search')
+    if table_search_map is None:
+        table_search_map = {table_name: table_name.lower().replace('_', ' ')
+                            for table_name in schema if not table_name.startswith('_')}
+        schema['_table_search'] = table_search_map
+
+    # Check for table name mentions, skipping the column scan on a hit.
+    # Big schemas match against hashed name shingles; small ones keep
+    # the plain substring scan, which is faster at that size
+    if len(table_search_map) > _SHINGLE_MIN_TABLES:
+        name_hashes = schema.get('_table_name_hashes')
+        if name_hashes is None:
+            name_hashes = {hash(tuple(search.split())): table_name
+                           for table_name, search in table_search_map.items()}
+            schema['_table_name_hashes'] = name_hashes
+
+        query_words = tuple(re.findall(r'\w+', query_lower))
+        hits = _shingle_hashes(query_words) & name_hashes.keys()
+        if hits:
+            # Prefer the most specific (longest) matching name
+            return max((name_hashes[h] for h in hits),
+                       key=lambda t: len(table_search_map[t]))
+    else:
+        for table_name, table_search in table_search_map.items():
+            if table_search in query_lower:
+                return table_name
+
+    # If no direct mention, try to match based on column names. Wide
+    # schemas score through the compiled integer loop when Numba is
+    # around; otherwise tally via the cached token -> tables map
+    query_tokens = re.findall(r'\w+', query_lower)
+
+    if njit is not None:
+        token_pairs = schema.get('_token_pairs')
+        if token_pairs is None and sum(
+                len(schema[t]['columns']) for t in table_search_map) >= _NUMBA_MIN_PAIRS:
+            token_pairs = _build_token_pairs(schema)
+            schema['_token_pairs'] = token_pairs
+
+        if token_pairs is not None:
+            table_names, token_to_id, pairs = token_pairs
+            q_ids = sorted({token_to_id[t] for t in query_tokens if t in token_to_id})
+
+            if q_ids:
+                scores = np.zeros(len(table_names), dtype=np.int32)
+                _score_pairs(pairs, np.asarray(q_ids, dtype=np.int32), scores)
+                best = int(scores.argmax())
+                if scores[best] > 0:
+                    return table_names[best]
+
+            # Nothing scored; skip the Counter pass, it would agree
+            return (max(table_search_map, key=lambda t: schema[t]['row_count'])
+                    if table_search_map else None)
+
+    col_tokens = schema.get('_col_tokens')
+    if col_tokens is None:
+        col_tokens = {}
+        for table_name, table_info in schema.items():
+            if table_name.startswith('_'):
+                continue
+            for col in table_info['columns']:
+                for token in re.findall(r'\w+', col['name'].lower()):
+                    col_tokens.setdefault(token, []).append(table_name)
+        schema['_col_tokens'] = col_tokens
+
+    table_scores = Counter()
+    for token in query_tokens:
+        for table_name in col_tokens.get(token, ()):
+            table_scores[table_name] += 1
+
     # Return the table with the most column mentions
-    if any(score > 0 for score in table_scores.values()):
-        return max(table_scores.items(), key=lambda x: x[1])[0]
-    
+    if table_scores:
+        return table_scores.most_common(1)[0][0]
+
     # If still no match, return the table with the most rows (most significant)
-    if schema:
-        return max(schema.items(), key=lambda x: x[1]['row_count'])[0]
-    
+    if table_search_map:
+        return max(table_search_map, key=lambda t: schema[t]['row_count'])
+
     return None
 
+def annotate_schema(schema):
+    '''Precompute per-table column roles after schema construction.
+
+    The roles never change for a fixed schema, so resolving them once
+    here turns every later identify_*_column call into a dict lookup.
+    '''
+    for table_name, table_info in schema.items():
+        if table_name.startswith('_'):
+            continue
+
+        identify_time_column(table_info)
+        identify_category_column(table_info)
+        identify_numeric_column(table_info)
+
+    return schema
+
 def identify_time_column(schema_info):
     '''Identify a timestamp/date column in a table.'''
-    time_keywords = ['time', 'date', 'day', 'month', 'year', 'created', 'updated', 'at']
-    
+    if '_time_col' in schema_info:
+        return schema_info['_time_col']
+
+    time_column = None
     for col in schema_info['columns']:
-        col_name = col['name'].lower()
-        if any(keyword in col_name for keyword in time_keywords):
-            return col['name']
-    
-    return None
+        if _TIME_KW_RE.search(col['name'].lower()):
+            time_column = col['name']
+            break
+
+    schema_info['_time_col'] = time_column
+    return time_column
 
 def identify_category_column(schema_info):
     '''Identify a categorical column in a table.'''
-    # Look for textual columns that aren't timestamps
-    time_keywords = ['time', 'date', 'day', 'month', 'year', 'created', 'updated', 'at']
-    category_keywords = ['type', 'category', 'name', 'status', 'level', 'tier', 'group', 'department']
-    
+    if '_category_col' in schema_info:
+        return schema_info['_category_col']
+
+    category_column = _find_category_column(schema_info)
+    schema_info['_category_col'] = category_column
+    return category_column
+
+def _find_category_column(schema_info):
+    '''Scan a table's columns for the best categorical candidate.'''
     # First try columns with category-like names
     for col in schema_info['columns']:
-        col_name = col['name'].lower()
-        if any(keyword in col_name for keyword in category_keywords):
+        if _CATEGORY_KW_RE.search(col['name'].lower()):
             return col['name']
-    
+
     # Then try any text column that's not a timestamp
     for col in schema_info['columns']:
         col_name = col['name'].lower()
         col_type = col['type'].lower()
-        
-        if ('char' in col_type or 'text' in col_type) and not any(keyword in col_name for keyword in time_keywords):
+
+        if ('char' in col_type or 'text' in col_type) and not _TIME_KW_RE.search(col_name):
             return col['name']
-    
+
     # Fallback to any non-primary key
     for col in schema_info['columns']:
         if not col['pk']:
             return col['name']
-    
+
     # Last resort: first column
     return schema_info['columns'][0]['name'] if schema_info['columns'] else None
 
 def identify_numeric_column(schema_info):
     '''Identify a numeric column in a table.'''
-    # Look for numeric columns with value-like names
-    value_keywords = ['count', 'amount', 'value', 'price', 'cost', 'quantity', 'num', 'total', 'sum']
-    
+    if '_numeric_col' in schema_info:
+        return schema_info['_numeric_col']
+
+    numeric_column = _find_numeric_column(schema_info)
+    schema_info['_numeric_col'] = numeric_column
+    return numeric_column
+
+def _find_numeric_column(schema_info):
+    '''Scan a table's columns for the best numeric candidate.'''
     # First try columns with value-like names
     for col in schema_info['columns']:
-        col_name = col['name'].lower()
-        if any(keyword in col_name for keyword in value_keywords):
+        if _VALUE_KW_RE.search(col['name'].lower()):
             return col['name']
-    
+
     # Then try any numeric column that's not a primary key
     for col in schema_info['columns']:
         col_type = col['type'].lower()
-        
+
         if ('int' in col_type or 'float' in col_type or 'double' in col_type or 'real' in col_type or 'numeric' in col_type) and not col['pk']:
             return col['name']
-    
+
     # Fallback to COUNT(*)
     return '*'
 
-def identify_aggregation_function(query):
+def identify_aggregation_function(query_lower):
     '''Identify the aggregation function to use based on query.'''
-    if 'average' in query.lower() or 'avg' in query.lower():
-        return 'AVG'
-    elif 'sum' in query.lower() or 'total' in query.lower():
-        return 'SUM'
-    elif 'minimum' in query.lower() or 'min' in query.lower():
-        return 'MIN'
-    elif 'maximum' in query.lower() or 'max' in query.lower():
-        return 'MAX'
-    elif 'count' in query.lower() or 'how many' in query.lower() or 'number of' in query.lower():
-        return 'COUNT'
-    
+    for keywords, sql_func in _AGG_FUNCTIONS:
+        if any(kw in query_lower for kw in keywords):
+            return sql_func
+
     # Default to COUNT
     return 'COUNT'
 
-def extract_limit(query):
+def extract_limit(query_lower):
     '''Extract a LIMIT value from the query.'''
     # Look for patterns like "top 10" or "5 highest"
-    number_pattern = r'(?:top|first|highest|best)\s+(\d+)|(\d+)\s+(?:top|first|highest|best)'
-    match = re.search(number_pattern, query.lower())
-    
+    match = _LIMIT_RE.search(query_lower)
+
     if match:
         # Return the first non-None capturing group
         for group in match.groups():
             if group:
                 return int(group)
-    
+
     # Default to 10 for top queries
-    if any(kw in query.lower() for kw in ['top', 'highest', 'best']):
+    if any(kw in query_lower for kw in ('top', 'highest', 'best')):
         return 10
-    
+
     return None
 
-def generate_trend_query(query, schema):
+def generate_trend_query(query_lower, schema):
     '''Generate a trend analysis query.'''
     # Identify relevant table
-    table_name = identify_relevant_table(query, schema)
+    table_name = identify_relevant_table(query_lower, schema)
     
     if not table_name:
         return {
@@ -196,7 +370,7 @@ def generate_trend_query(query, schema):
     
     # Identify value column
     value_column = identify_numeric_column(table_info)
-    agg_func = identify_aggregation_function(query)
+    agg_func = identify_aggregation_function(query_lower)
     
     # Format the time column for grouping (if it's a timestamp/date)
     time_format = time_column
@@ -222,10 +396,10 @@ def generate_trend_query(query, schema):
         'y_axis': 'value'
     }
 
-def generate_distribution_query(query, schema):
+def generate_distribution_query(query_lower, schema):
     '''Generate a distribution analysis query.'''
     # Identify relevant table
-    table_name = identify_relevant_table(query, schema)
+    table_name = identify_relevant_table(query_lower, schema)
     
     if not table_name:
         return {
@@ -256,30 +430,30 @@ def generate_distribution_query(query, schema):
     return {
         'success': True,
         'query': sql_query,
-        'visualization_type': 'pie' if 'percentage' in query.lower() else 'bar',
+        'visualization_type': 'pie' if 'percentage' in query_lower else 'bar',
         'explanation': f"Analyzing distribution of {category_column} in {table_name}",
         'table': table_name,
         'x_axis': category_column,
         'y_axis': 'count'
     }
 
-def generate_top_query(query, schema):
+def generate_top_query(query_lower, schema):
     '''Generate a top N query.'''
     # Implementation details omitted for brevity
     # Similar structure to the functions above
     pass
 
-def generate_comparison_query(query, schema):
+def generate_comparison_query(query_lower, schema):
     '''Generate a comparison query.'''
     # Implementation details omitted for brevity
     pass
 
-def generate_aggregate_query(query, schema):
+def generate_aggregate_query(query_lower, schema):
     '''Generate an aggregate query.'''
     # Implementation details omitted for brevity
     pass
 
-def generate_generic_query(query, schema):
+def generate_generic_query(query_lower, schema):
     '''Generate a generic query when no specific pattern is matched.'''
     # Implementation details omitted for brevity
     pass
\ No newline at end of file
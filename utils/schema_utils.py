@@ -23,75 +23,101 @@ def table_health_analysis(conn, table_name, schema_info):
     }
     
     try:
-        cursor = conn.cursor()
-        
-        # Check nulls for each column
         for col in schema_info['columns']:
-            col_name = col['name']
-            
-            # Count nulls
-            query = f"SELECT COUNT(*) FROM {table_name} WHERE {col_name} IS NULL;"
-            cursor.execute(query)
-            null_count = cursor.fetchone()[0]
-            health_metrics['null_counts'][col_name] = null_count
-            
-            # Check data type distribution
-            col_type = col['type'].lower()
-            health_metrics['data_types'][col_name] = col_type
-            
-            # Add data quality checks based on type
-            if 'int' in col_type or col_type == 'integer':
-                # For numeric columns, check min/max/avg
-                try:
-                    query = f"SELECT MIN({col_name}), MAX({col_name}), AVG({col_name}) FROM {table_name} WHERE {col_name} IS NOT NULL;"
-                    cursor.execute(query)
-                    min_val, max_val, avg_val = cursor.fetchone()
-                    
-                    health_metrics['data_quality'][col_name] = {
-                        'min': min_val,
-                        'max': max_val,
-                        'avg': avg_val
-                    }
-                except:
-                    pass
-            
-            elif 'char' in col_type or 'text' in col_type or 'varchar' in col_type:
-                # For text columns, check empty strings and length stats
-                try:
-                    query = f"SELECT COUNT(*) FROM {table_name} WHERE {col_name} = '';"
-                    cursor.execute(query)
-                    empty_count = cursor.fetchone()[0]
-                    
-                    query = f"SELECT MIN(LENGTH({col_name})), MAX(LENGTH({col_name})), AVG(LENGTH({col_name})) FROM {table_name} WHERE {col_name} IS NOT NULL;"
-                    cursor.execute(query)
-                    min_len, max_len, avg_len = cursor.fetchone()
-                    
-                    health_metrics['data_quality'][col_name] = {
-                        'empty_strings': empty_count,
-                        'min_length': min_len,
-                        'max_length': max_len,
-                        'avg_length': avg_len
-                    }
-                except:
-                    pass
-        
-        # Try to determine last updated timestamp
-        timestamp_columns = [col['name'] for col in schema_info['columns'] 
-                          if any(term in col['name'].lower() for term in ['time', 'date', '_at', 'updated'])]
-        
-        if timestamp_columns:
-            try:
-                query = f"SELECT MAX({timestamp_columns[0]}) FROM {table_name};"
-                cursor.execute(query)
-                last_updated = cursor.fetchone()[0]
-                
-                if last_updated:
-                    health_metrics['last_updated'] = last_updated
-            except:
-                pass
-        
+            health_metrics['data_types'][col['name']] = col['type'].lower()
+
+        # Build the statement once per table and cache it on the schema
+        # dict; re-analysis then reuses byte-identical SQL, which lets
+        # sqlite3's statement cache skip the parse/plan step entirely
+        cached = schema_info.get('_health_sql')
+        if cached is None:
+            # Collect every per-column aggregate into one SELECT so the
+            # table is scanned once instead of 3-4 round-trips per column
+            expressions = []
+            slots = []
+
+            for col in schema_info['columns']:
+                col_name = col['name']
+                col_type = col['type'].lower()
+
+                # Count nulls
+                expressions.append(f"SUM(CASE WHEN {col_name} IS NULL THEN 1 ELSE 0 END)")
+                slots.append((col_name, 'null'))
+
+                # Add data quality checks based on type
+                if 'int' in col_type or col_type == 'integer':
+                    # For numeric columns, check min/max/avg
+                    expressions.extend([
+                        f"MIN({col_name})",
+                        f"MAX({col_name})",
+                        f"AVG({col_name})"
+                    ])
+                    slots.append((col_name, 'numeric'))
+
+                elif 'char' in col_type or 'text' in col_type or 'varchar' in col_type:
+                    # For text columns, check empty strings and length stats
+                    expressions.extend([
+                        f"COALESCE(SUM(CASE WHEN {col_name} = '' THEN 1 ELSE 0 END), 0)",
+                        f"MIN(LENGTH({col_name}))",
+                        f"MAX(LENGTH({col_name}))",
+                        f"AVG(LENGTH({col_name}))"
+                    ])
+                    slots.append((col_name, 'text'))
+
+            # Fold the last-updated timestamp into the same scan
+            timestamp_columns = [col['name'] for col in schema_info['columns']
+                              if any(term in col['name'].lower() for term in ['time', 'date', '_at', 'updated'])]
+
+            if timestamp_columns:
+                expressions.append(f"MAX({timestamp_columns[0]})")
+                slots.append((timestamp_columns[0], 'last_updated'))
+
+            sql_query = (f"SELECT {', '.join(expressions)} FROM {table_name};"
+                         if expressions else None)
+            cached = (sql_query, tuple(slots))
+            schema_info['_health_sql'] = cached
+
+        sql_query, slots = cached
+        if sql_query is None:
+            return health_metrics
+
+        cursor = conn.cursor()
+        # Single-row result; no point pre-allocating the default batch
+        cursor.arraysize = 1
+
+        cursor.execute(sql_query)
+        row = cursor.fetchone()
+
+        # Map the single result row back onto the metrics dict
+        pos = 0
+        for col_name, kind in slots:
+            if kind == 'null':
+                health_metrics['null_counts'][col_name] = row[pos] or 0
+                pos += 1
+            elif kind == 'numeric':
+                min_val, max_val, avg_val = row[pos:pos + 3]
+                health_metrics['data_quality'][col_name] = {
+                    'min': min_val,
+                    'max': max_val,
+                    'avg': avg_val
+                }
+                pos += 3
+            elif kind == 'text':
+                empty_count, min_len, max_len, avg_len = row[pos:pos + 4]
+                health_metrics['data_quality'][col_name] = {
+                    'empty_strings': empty_count,
+                    'min_length': min_len,
+                    'max_length': max_len,
+                    'avg_length': avg_len
+                }
+                pos += 4
+            elif kind == 'last_updated':
+                if row[pos]:
+                    health_metrics['last_updated'] = row[pos]
+                pos += 1
+
         return health_metrics
-        
+
     except Exception as e:
         print(f"Error analyzing table health: {e}")
         return health_metrics
\ No newline at end of file
@@ -2,40 +2,241 @@
 Utility functions for generating SQL from natural language.
 """
 
+import asyncio
+import re
+import threading
+from functools import lru_cache
+
+import sqlparse
 from langchain.chains import create_sql_query_chain
 from langchain.utilities import SQLDatabase
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
 from .llm_utils import initialize_claude
 
+# Cap on in-flight Claude calls when batching, to stay within rate limits
+MAX_CONCURRENT_LLM_CALLS = 8
+
+# Short questions over small schemas route to Haiku, which answers
+# simple SQL generation at a fraction of Opus latency and cost
+_SIMPLE_QUERY_MAX_WORDS = 15
+_SIMPLE_SCHEMA_MAX_CHARS = 4000
+_COMPLEX_HINTS = ('compare', 'versus', 'per each', 'join')
+
+# Optional markdown fences around a generated SQL payload
+_FENCE_RE = re.compile(r'(?s)\A\s*(?:```(?:sql)?\s*)?(.*?)\s*(?:```)?\s*\Z', re.IGNORECASE)
+
+# First table referenced by a FROM clause in partially generated SQL
+_FROM_TABLE_RE = re.compile(r'\bFROM\s+["`\[]?(\w+)', re.IGNORECASE)
+
+# Table headings in schema descriptions ("CREATE TABLE x" or "Table: x")
+_TABLE_HEADING_RE = re.compile(r'(?:CREATE TABLE|Table:?)\s+["`\[]?(\w+)', re.IGNORECASE)
+_TABLE_SPLIT_RE = re.compile(r'(?m)^(?=\s*(?:CREATE TABLE|Table:?\s))', re.IGNORECASE)
+
+@lru_cache(maxsize=8)
+def _split_schema_blocks(schema_description):
+    """Split a schema description into per-table blocks, keyed by table name.
+
+    Returns an empty dict when the description doesn't follow a
+    recognizable per-table layout, in which case callers keep the full
+    description. Cached so repeated queries reuse the parse.
+    """
+    blocks = {}
+
+    for part in _TABLE_SPLIT_RE.split(schema_description):
+        if not part.strip():
+            continue
+
+        match = _TABLE_HEADING_RE.search(part)
+        if match is None:
+            return {}
+
+        blocks[match.group(1)] = part.strip()
+
+    return blocks
+
+def _project_schema(query, schema_description):
+    """Trim the schema description to the tables the question mentions.
+
+    Prompt-processing latency and cost scale with prompt length, so a
+    question that names its tables only gets those blocks. Falls back
+    to the full description when no table is confidently matched.
+    """
+    blocks = _split_schema_blocks(schema_description)
+    if not blocks:
+        return schema_description
+
+    query_lower = query.lower()
+    relevant = [block for table, block in blocks.items()
+                if table.lower() in query_lower
+                or table.lower().replace('_', ' ') in query_lower]
+
+    if not relevant:
+        return schema_description
+
+    return "\n\n".join(relevant)
+
+def _pick_model(query, schema_description):
+    """Pick the cheapest model that can handle the question."""
+    query_lower = query.lower()
+
+    if (len(query.split()) < _SIMPLE_QUERY_MAX_WORDS
+            and not any(hint in query_lower for hint in _COMPLEX_HINTS)
+            and len(schema_description) < _SIMPLE_SCHEMA_MAX_CHARS):
+        return "claude-3-haiku-20240307"
+
+    return "claude-3-opus-20240229"
+
+def _build_messages(query, schema_description):
+    """Build the SQL-generation prompt for one question."""
+    return [
+        SystemMessage(content=f"""You are an expert SQL query generator.
+        Your task is to convert natural language questions into SQL queries.
+        Use only the tables and columns described in the schema below.
+        If the query is ambiguous, make reasonable assumptions.
+        Return ONLY the SQL query without any explanations.
+
+        DATABASE SCHEMA:
+        {schema_description}"""),
+        HumanMessage(content=f"Generate a SQL query to answer this question: {query}")
+    ]
+
+def _clean_sql(sql_query):
+    """Strip markdown fences from a generated SQL string in one pass."""
+    match = _FENCE_RE.match(sql_query)
+    return match.group(1) if match else sql_query.strip()
+
+def _is_valid_sql(sql_query):
+    """Cheap local syntax check; catches malformed output before the DB does."""
+    statements = sqlparse.parse(sql_query)
+    return bool(statements) and statements[0].get_type() != 'UNKNOWN'
+
+async def nl_to_sql_async(query, db_uri, schema_description, llm=None):
+    """Convert natural language to SQL using Claude, without blocking the loop."""
+    try:
+        db = SQLDatabase.from_uri(db_uri)
+
+        # Send only the schema blocks this question needs
+        schema_description = _project_schema(query, schema_description)
+
+        if llm is None:
+            llm = initialize_claude(model_name=_pick_model(query, schema_description))
+
+        messages = _build_messages(query, schema_description)
+
+        # Generate SQL
+        response = await llm.ainvoke(messages)
+        sql_query = _clean_sql(response.content)
+
+        if not _is_valid_sql(sql_query):
+            # One short, cheap repair round beats letting the database
+            # discover the syntax error a round-trip later
+            fix_llm = initialize_claude(model_name="claude-3-haiku-20240307")
+            fix_messages = [
+                SystemMessage(content="Return ONLY a corrected, valid SQL query. No explanations."),
+                HumanMessage(content=f"This SQL query is malformed; fix it:\n{sql_query}")
+            ]
+            response = await fix_llm.ainvoke(fix_messages)
+            sql_query = _clean_sql(response.content)
+
+            if not _is_valid_sql(sql_query):
+                raise ValueError(f"Generated SQL failed validation: {sql_query}")
+
+        return sql_query
+    except Exception as e:
+        raise Exception(f"Error generating SQL: {str(e)}")
+
 def nl_to_sql(query, db_uri, schema_description):
     """Convert natural language to SQL using Claude."""
+    return asyncio.run(nl_to_sql_async(query, db_uri, schema_description))
+
+def nl_to_sql_stream(query, db_uri, schema_description, llm=None):
+    """Yield SQL fragments as Claude generates them.
+
+    Lets callers act on partial output (show progress, start parsing)
+    instead of blocking until the full response lands.
+    """
+    schema_description = _project_schema(query, schema_description)
+
+    if llm is None:
+        llm = initialize_claude(model_name=_pick_model(query, schema_description))
+
+    for chunk in llm.stream(_build_messages(query, schema_description)):
+        if chunk.content:
+            yield chunk.content
+
+def nl_to_sql_with_prefetch(query, db_uri, schema_description):
+    """Generate SQL while prefetching metadata for its first table.
+
+    Consumes the stream and, as soon as a FROM clause names a table,
+    loads that table's info on a background thread so the metadata
+    fetch overlaps the rest of the LLM generation.
+
+    Returns:
+        tuple: (sql_query, table_info); table_info is None when no
+        table was detected in time or the prefetch failed.
+    """
     try:
         db = SQLDatabase.from_uri(db_uri)
-        llm = initialize_claude()
-        
-        # Create a prompt for SQL generation
-        messages = [
-            SystemMessage(content=f"""You are an expert SQL query generator.
-            Your task is to convert natural language questions into SQL queries.
-            Use only the tables and columns described in the schema below.
-            If the query is ambiguous, make reasonable assumptions.
-            Return ONLY the SQL query without any explanations.
-            
-            DATABASE SCHEMA:
-            {schema_description}"""),
-            HumanMessage(content=f"Generate a SQL query to answer this question: {query}")
-        ]
-        
-        # Generate SQL
-        response = llm.invoke(messages)
-        sql_query = response.content.strip()
-        
-        # Clean up the SQL - remove any markdown formatting if present
-        if sql_query.startswith("```sql"):
-            sql_query = sql_query.split("```sql")[1]
-        if sql_query.endswith("```"):
-            sql_query = sql_query.split("```")[0]
-        
-        return sql_query.strip()
+
+        prefetched = {}
+
+        def _fetch(table_name):
+            try:
+                prefetched['table_info'] = db.get_table_info([table_name])
+            except Exception as e:
+                print(f"Error prefetching table info: {e}")
+
+        buffer = ""
+        thread = None
+
+        for piece in nl_to_sql_stream(query, db_uri, schema_description):
+            buffer += piece
+
+            if thread is None:
+                match = _FROM_TABLE_RE.search(buffer)
+                # Only fire once text follows the name, proving the
+                # identifier isn't still mid-stream
+                if match and match.end() < len(buffer):
+                    thread = threading.Thread(target=_fetch, args=(match.group(1),),
+                                              daemon=True)
+                    thread.start()
+
+        if thread is not None:
+            thread.join()
+        else:
+            # No overlap won, but keep the return shape consistent
+            match = _FROM_TABLE_RE.search(buffer)
+            if match:
+                _fetch(match.group(1))
+
+        sql_query = _clean_sql(buffer)
+        if not _is_valid_sql(sql_query):
+            raise ValueError(f"Generated SQL failed validation: {sql_query}")
+
+        return sql_query, prefetched.get('table_info')
     except Exception as e:
-        raise Exception(f"Error generating SQL: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error generating SQL: {str(e)}")
+
+def nl_to_sql_batch(queries, db_uri, schema_description):
+    """Convert several questions to SQL concurrently.
+
+    All calls share one client (and its connection pool) and overlap
+    their network round-trips via asyncio.gather, bounded by a
+    semaphore so a big dashboard doesn't trip Anthropic rate limits.
+
+    Returns:
+        list: One SQL string per query, in order; failed entries hold
+        the raising exception instead.
+    """
+    async def _run():
+        llm = initialize_claude()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+
+        async def _one(query):
+            async with semaphore:
+                return await nl_to_sql_async(query, db_uri, schema_description, llm=llm)
+
+        return await asyncio.gather(*(_one(query) for query in queries),
+                                    return_exceptions=True)
+
+    return asyncio.run(_run())
\ No newline at end of file
@@ -1,100 +1,160 @@
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import pandas as pd
 
+# Compose the shared theme once at import: 'plotly_white' plus our
+# margins. Passing the name string instead would re-resolve the theme
+# and rebuild the margin dict for every figure on a dashboard.
+_TEMPLATE = go.layout.Template(pio.templates['plotly_white'])
+_TEMPLATE.layout.margin = dict(l=40, r=40, t=60, b=40)
+
+# Above this many rows, line/scatter figures render through WebGL
+# (go.Scattergl) instead of SVG; override per chart with
+# config['webgl_threshold']
+WEBGL_THRESHOLD = 5000
+
+def _webgl_rows(data, config):
+    '''True when the data is large enough to warrant a WebGL trace.'''
+    return len(data) > config.get('webgl_threshold', WEBGL_THRESHOLD)
+
+def _xy(data, x_axis, y_axis):
+    '''Materialize the plotted columns as flat ndarrays once.
+
+    go traces accept ndarrays directly, skipping the repeated column
+    coercion px does when handed the whole DataFrame.
+    '''
+    x_vals = data[x_axis].to_numpy() if x_axis is not None else None
+    y_vals = data[y_axis].to_numpy() if y_axis is not None else None
+    return x_vals, y_vals
+
+def _line(data, x_axis, y_axis, title, config):
+    x_vals, y_vals = _xy(data, x_axis, y_axis)
+    trace_cls = go.Scattergl if _webgl_rows(data, config) else go.Scatter
+
+    fig = go.Figure(trace_cls(
+        x=x_vals,
+        y=y_vals,
+        mode='lines+markers' if config.get('markers', True) else 'lines'
+    ))
+    fig.update_layout(title=title, xaxis_title=x_axis, yaxis_title=y_axis)
+    return fig
+
+def _bar(data, x_axis, y_axis, title, config):
+    # Color mappings need px's grouping; otherwise feed flat arrays
+    if config.get('color'):
+        return px.bar(
+            data,
+            x=x_axis,
+            y=y_axis,
+            title=title,
+            color=config.get('color')
+        )
+
+    x_vals, y_vals = _xy(data, x_axis, y_axis)
+    fig = go.Figure(go.Bar(x=x_vals, y=y_vals))
+    fig.update_layout(title=title, xaxis_title=x_axis, yaxis_title=y_axis)
+    return fig
+
+def _pie(data, x_axis, y_axis, title, config):
+    return px.pie(
+        data,
+        names=x_axis,
+        values=y_axis,
+        title=title
+    )
+
+def _scatter(data, x_axis, y_axis, title, config):
+    # Color/size mappings need px's grouping; otherwise feed flat arrays
+    if config.get('color') or config.get('size'):
+        return px.scatter(
+            data,
+            x=x_axis,
+            y=y_axis,
+            title=title,
+            color=config.get('color'),
+            size=config.get('size')
+        )
+
+    x_vals, y_vals = _xy(data, x_axis, y_axis)
+    trace_cls = go.Scattergl if _webgl_rows(data, config) else go.Scatter
+
+    fig = go.Figure(trace_cls(x=x_vals, y=y_vals, mode='markers'))
+    fig.update_layout(title=title, xaxis_title=x_axis, yaxis_title=y_axis)
+    return fig
+
+def _heatmap(data, x_axis, y_axis, title, config):
+    # For correlation matrices or other heatmap data
+    return px.imshow(
+        data,
+        title=title
+    )
+
+def _area(data, x_axis, y_axis, title, config):
+    return px.area(
+        data,
+        x=x_axis,
+        y=y_axis,
+        title=title
+    )
+
+def _box(data, x_axis, y_axis, title, config):
+    return px.box(
+        data,
+        x=x_axis,
+        y=y_axis,
+        title=title
+    )
+
+def _histogram(data, x_axis, y_axis, title, config):
+    return px.histogram(
+        data,
+        x=x_axis,
+        title=title
+    )
+
+# Visualization type -> figure maker; one dict lookup replaces the
+# eight-way if/elif chain and makes new types a one-line registration
+_VIZ_DISPATCH = {
+    'line': _line,
+    'bar': _bar,
+    'pie': _pie,
+    'scatter': _scatter,
+    'heatmap': _heatmap,
+    'area': _area,
+    'box': _box,
+    'histogram': _histogram
+}
+
 def create_visualization(data, visualization_type, config=None):
     '''
     Create a visualization based on data and type.
-    
+
     Args:
         data (DataFrame): Data to visualize
         visualization_type (str): Type of visualization (line, bar, pie, table, etc.)
         config (dict, optional): Additional configuration parameters
-        
+
     Returns:
         object: Plotly figure object
     '''
     if config is None:
         config = {}
-    
-    fig = None
-    
+
+    # Nothing to plot; checked once here instead of per maker
+    if data.empty:
+        return None
+
     # Extract axis information from config
-    x_axis = config.get('x_axis', data.columns[0] if not data.empty else None)
-    y_axis = config.get('y_axis', data.columns[1] if len(data.columns) > 1 and not data.empty else None)
+    x_axis = config.get('x_axis', data.columns[0])
+    y_axis = config.get('y_axis', data.columns[1] if len(data.columns) > 1 else None)
     title = config.get('title', '')
-    
-    if visualization_type == 'line':
-        fig = px.line(
-            data, 
-            x=x_axis, 
-            y=y_axis, 
-            title=title,
-            markers=config.get('markers', True)
-        )
-        
-    elif visualization_type == 'bar':
-        fig = px.bar(
-            data, 
-            x=x_axis, 
-            y=y_axis, 
-            title=title,
-            color=config.get('color')
-        )
-        
-    elif visualization_type == 'pie':
-        fig = px.pie(
-            data, 
-            names=x_axis, 
-            values=y_axis, 
-            title=title
-        )
-        
-    elif visualization_type == 'scatter':
-        fig = px.scatter(
-            data, 
-            x=x_axis, 
-            y=y_axis, 
-            title=title,
-            color=config.get('color'),
-            size=config.get('size')
-        )
-        
-    elif visualization_type == 'heatmap':
-        # For correlation matrices or other heatmap data
-        fig = px.imshow(
-            data,
-            title=title
-        )
-        
-    elif visualization_type == 'area':
-        fig = px.area(
-            data, 
-            x=x_axis, 
-            y=y_axis, 
-            title=title
-        )
-        
-    elif visualization_type == 'box':
-        fig = px.box(
-            data, 
-            x=x_axis, 
-            y=y_axis, 
-            title=title
-        )
-        
-    elif visualization_type == 'histogram':
-        fig = px.histogram(
-            data, 
-            x=x_axis, 
-            title=title
-        )
-    
-    # Add common layout adjustments
+
+    maker = _VIZ_DISPATCH.get(visualization_type)
+    fig = maker(data, x_axis, y_axis, title, config) if maker else None
+
+    # Add common layout adjustments from the prebuilt template
     if fig:
-        fig.update_layout(
-            template='plotly_white',
-            margin=dict(l=40, r=40, t=60, b=40)
-        )
-    
+        fig.update_layout(template=_TEMPLATE)
+
     return fig
\ No newline at end of file